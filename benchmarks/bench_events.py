@@ -0,0 +1,144 @@
+"""Memory and CPU benchmark of the ZbxEvent representation.
+
+Compares the slotted ZbxEvent against the previous plain-object version
+(kept below as LegacyZbxEvent) for building events from decoded
+problem.get JSON and serializing them into sensor attributes. "rebuild"
+is the next full snapshot with 1% of the problems replaced; both variants
+reuse the events of unchanged problems the way AsyncZbx._add_problem
+does, so it compares the representations, not the reuse. "serialize" is
+the first serialization of new events, "again" the next state write of
+the same events, which slotted events answer from their cached attribute
+form. Timings are the best of REPEATS runs.
+
+Building from scratch and the first serialization cost more CPU for
+slotted events than for legacy ones, which kept the decoded JSON as it
+was and serialized by returning their __dict__; the slotted ones win on
+repeated writes and retained memory.
+
+Usage: python benchmarks/bench_events.py [count ...]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import integration  # noqa: F401
+from zabbix_evt_sensors.zabbix import ZbxEvent
+
+DEFAULT_COUNTS = (10_000, 100_000)
+REPEATS = 5
+
+
+class LegacyZbxEvent:
+    """ZbxEvent as it was before slots, interning and integer severity."""
+
+    def __init__(self, eid, name, severity, tags, host=None, info=None) -> None:
+        """Initialize the class."""
+        self.eid = eid
+        self.name = name
+        self.severity = severity
+        self.tags = tags
+        self.host = host or 'ZabbixService'
+        self.info = info or []
+
+    def unchanged(self, name, severity, host):
+        """Return True if a refetched problem still has this event's name, severity and host."""
+        return self.name == name and self.severity == severity and self.host == host
+
+
+def raw_problems(count, hosts=500, tag_values=50, churn=0):
+    """Return decoded problem.get output, with distinct str objects like json.loads gives.
+
+    churn gives that many problems new event IDs, as if resolved and reopened.
+    """
+    problems = [
+        {
+            "eventid": str(1_000_000 + i + (count if i < churn else 0)),
+            "severity": str(i % 6),
+            "name": f"Problem {i % 1000} on host",
+            "host": f"host-{i % hosts}.example.com",
+            "tags": [
+                {"tag": "service", "value": f"svc-{i % tag_values}"},
+                {"tag": "env", "value": "prod" if i % 3 else "staging"},
+                {"tag": "class", "value": "os"},
+            ],
+        }
+        for i in range(count)
+    ]
+    return json.loads(json.dumps(problems))
+
+
+def build(cls, raw):
+    return [cls(p["eventid"], p["name"], p["severity"], p["tags"], host=p["host"]) for p in raw]
+
+
+def rebuild(cls, raw, previous):
+    """Build the next snapshot given the previous one by event ID, like the problem table."""
+    events = []
+    for p in raw:
+        event = previous.get(p["eventid"])
+        if event is None or not event.unchanged(p["name"], p["severity"], p["host"]):
+            event = cls(p["eventid"], p["name"], p["severity"], p["tags"], host=p["host"])
+        events.append(event)
+    return events
+
+
+def best_of(func, *args, repeats=REPEATS):
+    best = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del result
+    return best
+
+
+def legacy_serialize(events):
+    return {e.host: vars(e) for e in events}, max((e.severity for e in events), default=-1)
+
+
+def serialize(events):
+    return {e.host: e.as_dict() for e in events}, max((e.severity for e in events), default=-1)
+
+
+def measure(cls, serializer, count):
+    raw = raw_problems(count)
+    build_time = best_of(build, cls, raw)
+    serialize_time = min(best_of(serializer, build(cls, raw), repeats=1) for _ in range(REPEATS))
+    events = build(cls, raw)
+    serializer(events)
+    again_time = best_of(serializer, events)
+    rebuild_time = best_of(rebuild, cls, raw_problems(count, churn=count // 100), {e.eid: e for e in events})
+    del raw, events
+
+    # Memory is traced in a separate run since tracemalloc skews timings
+    gc.collect()
+    tracemalloc.start()
+    raw = raw_problems(count)
+    events = build(cls, raw)
+    # Retained size once the decoded JSON is gone
+    del raw
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return build_time, rebuild_time, serialize_time, again_time, retained
+
+
+def main(counts):
+    print(f"{'events':>8} {'variant':>8} {'build ms':>10} {'rebuild ms':>11} {'serialize ms':>13} "
+          f"{'again ms':>9} {'retained MiB':>13}")
+    for count in counts:
+        for label, cls, serializer in (
+            ("legacy", LegacyZbxEvent, legacy_serialize),
+            ("slotted", ZbxEvent, serialize),
+        ):
+            build_time, rebuild_time, serialize_time, again_time, retained = measure(cls, serializer, count)
+            print(f"{count:>8} {label:>8} {build_time * 1000:>10.1f} {rebuild_time * 1000:>11.1f} "
+                  f"{serialize_time * 1000:>13.1f} {again_time * 1000:>9.1f} {retained / 2 ** 20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS)
@@ -0,0 +1,138 @@
+"""Poll benchmark of AsyncZbx against the local fake Zabbix server.
+
+For each problem count a fake_zabbix.py server is started in a subprocess
+and polled the way ZabbixUpdateCoordinator does (services and problems
+concurrently), with problem churn between polls. Reported per size:
+
+  first ms      wall time of the first (full snapshot) poll
+  poll ms       median wall time of the following polls
+  calls         API round trips per following poll
+  KiB           request + response bytes per following poll
+  writes        entity state writes per following poll (changed fingerprints)
+  peak MiB      tracemalloc peak of a full snapshot poll / a following poll
+
+Usage: python benchmarks/bench_poll.py [--sizes 1000 10000 100000] [--latency 0.05] ...
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import integration  # noqa: F401
+from zabbix_evt_sensors.zabbix import AsyncZbx, fingerprint
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def start_server(args, problems):
+    """Start fake_zabbix.py and return (process, port)."""
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "fake_zabbix.py"),
+         "--problems", str(problems), "--hosts", str(args.hosts), "--tags", str(args.tags),
+         "--tag-values", str(args.tag_values), "--services", str(args.services),
+         "--latency", str(args.latency)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    return proc, int(proc.stdout.readline())
+
+
+async def connect(args, port):
+    zbx = AsyncZbx("127.0.0.1", "benchmark", "api_jsonrpc.php", port, False,
+                   tag_values=[f"tag0:v{i}" for i in range(args.sensors)],
+                   full_sync_interval=args.full_sync_interval,
+                   topology_interval=args.topology_interval,
+                   page_size=args.page_size)
+    await zbx.async_connect()
+    return zbx
+
+
+async def poll(zbx):
+    services, problems = await asyncio.gather(zbx.async_services(), zbx.async_problems())
+    return {"svcs": services, "prbs": problems}
+
+
+def fingerprints(data, contexts):
+    return {(kind, name): fingerprint(data[kind].get(name, [])) for kind, name in contexts}
+
+
+async def timed_poll(zbx):
+    start = time.perf_counter()
+    data = await poll(zbx)
+    return data, time.perf_counter() - start
+
+
+async def traced_poll(zbx):
+    tracemalloc.start()
+    await poll(zbx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def run_size(args, problems):
+    proc, port = start_server(args, problems)
+    try:
+        zbx = await connect(args, port)
+        await zbx.zapi.bench.stats()
+        data, first = await timed_poll(zbx)
+        contexts = [("prbs", key) for key in zbx.tag_values] + [("svcs", key) for key in data["svcs"]]
+        prints = fingerprints(data, contexts)
+        await zbx.zapi.bench.stats()
+
+        times, calls, sizes, writes = [], [], [], []
+        for _ in range(args.polls):
+            await zbx.zapi.bench.tick(churn=args.churn)
+            data, elapsed = await timed_poll(zbx)
+            stats = await zbx.zapi.bench.stats()
+            new_prints = fingerprints(data, contexts)
+            times.append(elapsed)
+            calls.append(stats["requests"])
+            sizes.append(stats["bytes"])
+            writes.append(sum(new_prints[ctx] != prints[ctx] for ctx in contexts))
+            prints = new_prints
+        await zbx.async_close()
+
+        traced = await connect(args, port)
+        peak_full = await traced_poll(traced)
+        await traced.zapi.bench.tick(churn=args.churn)
+        peak_next = await traced_poll(traced)
+        await traced.async_close()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"{problems:>8} {first * 1000:>9.1f} {statistics.median(times) * 1000:>8.1f} "
+          f"{statistics.mean(calls):>6.1f} {statistics.mean(sizes) / 1024:>9.1f} "
+          f"{statistics.mean(writes):>7.1f} {peak_full / 2 ** 20:>9.1f} / {peak_next / 2 ** 20:.1f}")
+
+
+async def main(args):
+    print(f"{'problems':>8} {'first ms':>9} {'poll ms':>8} {'calls':>6} {'KiB':>9} {'writes':>7} {'peak MiB':>9}")
+    for problems in args.sizes:
+        await run_size(args, problems)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="open problem counts")
+    parser.add_argument("--polls", type=int, default=10, help="polls after the first one")
+    parser.add_argument("--churn", type=int, default=10, help="problems opened and resolved between polls")
+    parser.add_argument("--sensors", type=int, default=10, help="configured tag:value problem sensors")
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--tags", type=int, default=3, help="tags per problem")
+    parser.add_argument("--tag-values", type=int, default=100, help="distinct values per tag")
+    parser.add_argument("--services", type=int, default=20, help="root services")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--full-sync-interval", type=int, default=0,
+                        help="seconds between full problem snapshots, 0 polls full snapshots only")
+    parser.add_argument("--topology-interval", type=int, default=0,
+                        help="seconds between service tree refreshes, 0 fetches the tree every poll")
+    parser.add_argument("--page-size", type=int, default=0,
+                        help="problems per problem.get page, 0 fetches all at once")
+    asyncio.run(main(parser.parse_args()))
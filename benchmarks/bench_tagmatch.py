@@ -0,0 +1,57 @@
+"""CPU benchmark of problem tag matching.
+
+Indexes synthetic problems against configured keys the way
+AsyncZbx._problem_keys does: the previous exact-only set lookup, TagMatcher with
+the same exact keys, and TagMatcher with prefix and glob patterns added.
+
+Usage: python benchmarks/bench_tagmatch.py [--problems 100000] [--patterns 10 100 500]
+"""
+import argparse
+import random
+import time
+
+import integration  # noqa: F401
+from zabbix_evt_sensors.tagmatch import TagMatcher
+
+
+def raw_tags(count, tags=3, tag_values=100, seed=1):
+    rnd = random.Random(seed)
+    return [
+        [{"tag": f"tag{t}", "value": f"prod-{rnd.randrange(tag_values)}"} for t in range(tags)]
+        for _ in range(count)
+    ]
+
+
+def exact_keys(tags, keys):
+    """Matching as it was before patterns."""
+    return [key for key in (f'{tag["tag"]}:{tag["value"]}' for tag in tags) if key in keys]
+
+
+def timed(label, count, func, problems):
+    start = time.perf_counter()
+    matched = sum(1 for tags in problems if func(tags))
+    elapsed = time.perf_counter() - start
+    print(f"{label:>24} {count:>9} {elapsed * 1000:>9.1f} {matched:>9}")
+
+
+def main(args):
+    problems = raw_tags(args.problems)
+    exact = frozenset(f"tag0:prod-{i}" for i in range(10))
+    print(f"{'variant':>24} {'keys':>9} {'ms':>9} {'matched':>9}")
+    timed("exact set", len(exact), lambda tags: exact_keys(tags, exact), problems)
+    timed("TagMatcher exact", len(exact), TagMatcher(exact).match, problems)
+    for count in args.patterns:
+        # Half trailing-star prefixes, half general globs, spread over the tags
+        patterns = set(exact)
+        for i in range(count):
+            tag = f"tag{i % 3}"
+            patterns.add(f"{tag}:prod-{i}*" if i % 2 else f"{tag}:*-{i}?")
+        timed("TagMatcher patterns", len(patterns), TagMatcher(patterns).match, problems)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--problems", type=int, default=100_000)
+    parser.add_argument("--patterns", type=int, nargs="+", default=(10, 100, 500),
+                        help="pattern counts added to the exact keys")
+    main(parser.parse_args())
@@ -0,0 +1,263 @@
+"""Local stand-in for the Zabbix JSON-RPC API, serving synthetic data.
+
+Answers the API methods the integration uses with a configurable number of
+problems, tags, hosts and services, and an injectable per-request latency.
+Two extra methods drive benchmarks: bench.tick opens and resolves problems
+and flips service statuses, bench.stats returns and resets the request and
+byte counters.
+
+Usage: python benchmarks/fake_zabbix.py --problems 10000 [--port 0] ...
+The listening port is printed as the first line on stdout.
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+API_VERSION = "7.0.0"
+
+
+class FakeZabbix:
+    """Synthetic Zabbix event and service store."""
+
+    def __init__(self, problems=1000, hosts=100, tags=3, tag_values=20, services=20, children=4,
+                 latency=0.0, seed=1) -> None:
+        """Initialize the store with open problems and a service tree."""
+        self.rnd = random.Random(seed)
+        self.hosts = hosts
+        self.tags = tags
+        self.tag_values = tag_values
+        self.latency = latency
+        self.requests = 0
+        self.bytes = 0
+        self.events = {}
+        self.open = {}
+        self._next_eventid = 1
+        self._next_trigger = 1
+        for _ in range(problems):
+            self._open_problem()
+        self.services = []
+        for root in range(services):
+            root_id = str(root * (children + 1) + 1)
+            child_ids = [str(int(root_id) + i + 1) for i in range(children)]
+            self.services.append({
+                "serviceid": root_id, "name": f"service-{root}", "description": f"Service {root}",
+                "status": "-1", "children": child_ids, "parents": [],
+                "tags": [{"tag": "service", "value": f"service-{root}"}],
+            })
+            for child_id in child_ids:
+                self.services.append({
+                    "serviceid": child_id, "name": f"component-{child_id}", "description": "",
+                    "status": "-1", "children": [], "parents": [root_id], "tags": [],
+                })
+        self.services_by_id = {s["serviceid"]: s for s in self.services}
+
+    def _new_eventid(self):
+        eid = str(self._next_eventid)
+        self._next_eventid += 1
+        return eid
+
+    def _open_problem(self):
+        trigger = str(self._next_trigger)
+        self._next_trigger += 1
+        hostid = str(self.rnd.randrange(self.hosts) + 1)
+        event = {
+            "eventid": self._new_eventid(), "value": "1", "source": "0", "object": "0",
+            "objectid": trigger, "clock": "1700000000", "severity": str(self.rnd.randrange(6)),
+            "name": f"Problem on trigger {trigger}", "r_eventid": "0", "hostid": hostid,
+            "tags": [{"tag": f"tag{t}", "value": f"v{self.rnd.randrange(self.tag_values)}"}
+                     for t in range(self.tags)],
+        }
+        self.events[event["eventid"]] = event
+        self.open[event["eventid"]] = event
+
+    def _resolve_problem(self, eid):
+        problem = self.open.pop(eid)
+        recovery = dict(problem, eventid=self._new_eventid(), value="0", severity="0")
+        problem["r_eventid"] = recovery["eventid"]
+        self.events[recovery["eventid"]] = recovery
+
+    def tick(self, churn=10, service_flips=1):
+        """Resolve and open churn problems, flip some service statuses."""
+        for eid in self.rnd.sample(sorted(self.open), min(churn, len(self.open))):
+            self._resolve_problem(eid)
+        for _ in range(churn):
+            self._open_problem()
+        for _ in range(service_flips):
+            service = self.rnd.choice(self.services)
+            service["status"] = "-1" if service["status"] != "-1" else str(self.rnd.randrange(6))
+        return {"open": len(self.open), "events": len(self.events)}
+
+    def stats(self):
+        """Return and reset the request counters."""
+        result = {"requests": self.requests, "bytes": self.bytes}
+        self.requests = 0
+        self.bytes = 0
+        return result
+
+    @staticmethod
+    def _matches_tags(event, params):
+        tag_filter = params.get("tags")
+        if not tag_filter:
+            return True
+        hits = [
+            any(
+                tag["tag"] == t["tag"] and (
+                    operator == 4
+                    or (operator == 0 and t.get("value", "") in tag["value"])
+                    or (operator == 1 and t.get("value", "") == tag["value"])
+                )
+                for tag in event["tags"]
+            )
+            for t in tag_filter
+            for operator in (int(t.get("operator", 0)),)
+        ]
+        return any(hits) if int(params.get("evaltype", 0)) == 2 else all(hits)
+
+    def _event_output(self, event, params):
+        output = params.get("output", "extend")
+        if output == "extend":
+            result = {k: v for k, v in event.items() if k not in ("tags", "hostid")}
+        else:
+            result = {k: event[k] for k in output if k in event}
+        if params.get("selectTags"):
+            result["tags"] = event["tags"]
+        if params.get("selectHosts"):
+            hostid = event["hostid"]
+            result["hosts"] = [{"hostid": hostid, "name": f"host-{hostid}"}]
+        return result
+
+    def _select_events(self, source, params):
+        if params.get("eventids") is not None:
+            events = (source[eid] for eid in map(str, params["eventids"]) if eid in source)
+        else:
+            events = source.values()
+        eid_from = int(params.get("eventid_from", 0))
+        eid_till = int(params.get("eventid_till", 0)) or None
+        value = params.get("value")
+        objectids = None if params.get("objectids") is None else set(map(str, params["objectids"]))
+        selected = [
+            e for e in events
+            if int(e["eventid"]) >= eid_from
+            and (objectids is None or e["objectid"] in objectids)
+            and (eid_till is None or int(e["eventid"]) <= eid_till)
+            and (value is None or e["value"] in map(str, value if isinstance(value, list) else [value]))
+            and self._matches_tags(e, params)
+        ]
+        if params.get("sortfield"):
+            selected.sort(key=lambda e: int(e["eventid"]), reverse=params.get("sortorder") == "DESC")
+        if params.get("limit"):
+            selected = selected[:int(params["limit"])]
+        if params.get("countOutput"):
+            return str(len(selected))
+        return [self._event_output(e, params) for e in selected]
+
+    def problem_get(self, params):
+        return self._select_events(self.open, params)
+
+    def event_get(self, params):
+        return self._select_events(self.events, params)
+
+    def host_get(self, params):
+        groups_key = "hostgroups" if params.get("selectHostGroups") else "groups"
+        return [
+            {
+                "hostid": str(hostid), "name": f"host-{hostid}",
+                # Every tenth host is in maintenance
+                "maintenance_status": "1" if hostid % 10 == 0 else "0",
+                groups_key: [{"name": f"group-{hostid % 5}"}, {"name": "all-hosts"}],
+                "tags": [{"tag": "site", "value": f"site-{hostid % 3}"}],
+            }
+            for hostid in range(1, self.hosts + 1)
+        ]
+
+    def service_get(self, params):
+        services = self.services
+        if params.get("serviceids") is not None:
+            ids = set(map(str, params["serviceids"]))
+            services = [s for s in services if s["serviceid"] in ids]
+        if params.get("countOutput"):
+            return str(len(services))
+        output = params.get("output", "extend")
+        result = []
+        for service in services:
+            item = {k: v for k, v in service.items() if output == "extend" or k in output}
+            item.pop("children", None)
+            item.pop("parents", None)
+            item.pop("tags", None)
+            if params.get("selectChildren"):
+                item["children"] = [
+                    {k: self.services_by_id[c][k] for k in ("serviceid", "name", "status")}
+                    for c in service["children"]
+                ]
+            if params.get("selectParents") == "count":
+                item["parents"] = str(len(service["parents"]))
+            elif params.get("selectParents"):
+                item["parents"] = [{"serviceid": p} for p in service["parents"]]
+            if params.get("selectTags"):
+                item["tags"] = service["tags"]
+            result.append(item)
+        return result
+
+    async def handle(self, request):
+        body = await request.read()
+        req = json.loads(body)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        method = req["method"]
+        params = req.get("params") or {}
+        handlers = {
+            "apiinfo.version": lambda p: API_VERSION,
+            "user.checkAuthentication": lambda p: {"userid": "1"},
+            "problem.get": self.problem_get,
+            "event.get": self.event_get,
+            "host.get": self.host_get,
+            "service.get": self.service_get,
+            "bench.tick": lambda p: self.tick(**p),
+            "bench.stats": lambda p: self.stats(),
+        }
+        handler = handlers.get(method)
+        if handler is None:
+            response = {"jsonrpc": "2.0", "id": req.get("id"),
+                        "error": {"code": -32601, "message": "Method not found.", "data": method}}
+        else:
+            response = {"jsonrpc": "2.0", "id": req.get("id"), "result": handler(params)}
+        payload = json.dumps(response).encode()
+        if not method.startswith("bench."):
+            self.requests += 1
+            self.bytes += len(body) + len(payload)
+        return web.Response(body=payload, content_type="application/json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--problems", type=int, default=1000)
+    parser.add_argument("--hosts", type=int, default=100)
+    parser.add_argument("--tags", type=int, default=3, help="tags per problem")
+    parser.add_argument("--tag-values", type=int, default=20, help="distinct values per tag")
+    parser.add_argument("--services", type=int, default=20, help="root services")
+    parser.add_argument("--children", type=int, default=4, help="children per root service")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    fake = FakeZabbix(args.problems, args.hosts, args.tags, args.tag_values, args.services,
+                      args.children, args.latency)
+    app = web.Application(client_max_size=64 * 2 ** 20)
+    app.router.add_post("/{tail:.*}", fake.handle)
+
+    async def serve():
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", args.port)
+        await site.start()
+        print(site._server.sockets[0].getsockname()[1], flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
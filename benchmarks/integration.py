@@ -0,0 +1,16 @@
+"""Make the integration's Home Assistant independent modules importable.
+
+Registers custom_components/zabbix_evt_sensors as the zabbix_evt_sensors
+package without running its __init__, which sets up the HA config entry.
+"""
+import os
+import sys
+import types
+
+PACKAGE = "zabbix_evt_sensors"
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components", PACKAGE)
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [PACKAGE_DIR]
+    sys.modules[PACKAGE] = package
@@ -5,7 +5,6 @@ import logging
 
 import urllib3
 
-from zabbix_utils.exceptions import APIRequestError
 from homeassistant.config_entries import ConfigEntry, ConfigEntryNotReady
 from homeassistant.const import (
     CONF_API_TOKEN,
@@ -15,42 +14,90 @@ from homeassistant.const import (
     CONF_SSL,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-
-from .const import ZBX_HOST_KEY, DOMAIN
-from .zabbix import Zbx
+from homeassistant.core import HomeAssistant, ServiceCall
+
+from .const import (
+    DEFAULT_FULL_SYNC_INTERVAL,
+    DEFAULT_HOST_METADATA_INTERVAL,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_REQUEST_TIMEOUT,
+    DEFAULT_TOPOLOGY_INTERVAL,
+    DATA_CLIENTS,
+    DOMAIN,
+    SERVICE_PROFILE_CYCLE,
+    ZBX_EXCLUDE_MAINTENANCE,
+    ZBX_FRONTENDS,
+    ZBX_FULL_SYNC_INTERVAL,
+    ZBX_HOST_KEY,
+    ZBX_HOST_METADATA_INTERVAL,
+    ZBX_HOSTGROUP_LIST,
+    ZBX_HOSTGROUPS_KEY,
+    ZBX_PAGE_SIZE,
+    ZBX_PROBLEMS_KEY,
+    ZBX_REQUEST_TIMEOUT,
+    ZBX_TAG_VALUE_LIST,
+)
+from .snapshot import ZbxSnapshotStore
+from .zabbix import AsyncZbx, ZbxClient, api_urls
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _async_get_client(hass: HomeAssistant, cfg) -> ZbxClient:
+    """Return the client shared by all entries polling the same frontends with the same token.
+
+    The request timeout of the entry that created the client applies to all of them.
+    """
+    urls = api_urls(cfg[CONF_HOST], cfg[CONF_PATH], cfg[CONF_PORT], cfg[CONF_SSL], cfg.get(ZBX_FRONTENDS, ""))
+    key = (tuple(urls), cfg[CONF_API_TOKEN])
+    clients = hass.data.setdefault(DATA_CLIENTS, {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = ZbxClient(
+            urls, cfg[CONF_API_TOKEN], timeout=cfg.get(ZBX_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+        )
+    return client
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Zabbix Problems from config entry."""
     hass.data.setdefault(DOMAIN, {})
 
-    # Create Zabbix client in executor; wrap connection errors so HA retries startup
+    # Create the async Zabbix client; the coordinator logs in on HA's shared session with its first poll
     cfg = entry.data.get(ZBX_HOST_KEY)
     if not cfg:
         _LOGGER.warning("Missing %s in entry %s; deferring setup", ZBX_HOST_KEY, entry.entry_id)
         raise ConfigEntryNotReady
 
     _LOGGER.debug("Creating Zabbix client for entry %s", entry.entry_id)
-    try:
-        zbx = await hass.async_add_executor_job(
-            Zbx,
-            cfg[CONF_HOST],
-            cfg[CONF_API_TOKEN],
-            cfg[CONF_PATH],
-            cfg[CONF_PORT],
-            cfg[CONF_SSL]
-        )
-    except APIRequestError as e:
-        # Defer setup until the API becomes available
-        raise ConfigEntryNotReady from e
+    zbx = AsyncZbx(
+        cfg[CONF_HOST],
+        cfg[CONF_API_TOKEN],
+        cfg[CONF_PATH],
+        cfg[CONF_PORT],
+        cfg[CONF_SSL],
+        tag_values=entry.data.get(ZBX_TAG_VALUE_LIST, []) if entry.data.get(ZBX_PROBLEMS_KEY) else [],
+        full_sync_interval=cfg.get(ZBX_FULL_SYNC_INTERVAL, DEFAULT_FULL_SYNC_INTERVAL),
+        topology_interval=DEFAULT_TOPOLOGY_INTERVAL,
+        page_size=cfg.get(ZBX_PAGE_SIZE, DEFAULT_PAGE_SIZE),
+        host_metadata_interval=cfg.get(ZBX_HOST_METADATA_INTERVAL, DEFAULT_HOST_METADATA_INTERVAL),
+        exclude_maintenance=entry.data.get(ZBX_EXCLUDE_MAINTENANCE, False),
+        host_groups=entry.data.get(ZBX_HOSTGROUP_LIST, []) if entry.data.get(ZBX_HOSTGROUPS_KEY) else [],
+        client=_async_get_client(hass, cfg)
+    )
 
     hass.data[DOMAIN][entry.entry_id] = zbx
 
+    if not hass.services.has_service(DOMAIN, SERVICE_PROFILE_CYCLE):
+        async def _profile_cycle(call: ServiceCall) -> None:
+            """Run the next poll of every entry under cProfile; results go to diagnostics."""
+            for entry_zbx in hass.data[DOMAIN].values():
+                entry_zbx.metrics.profile_next = True
+
+        hass.services.async_register(DOMAIN, SERVICE_PROFILE_CYCLE, _profile_cycle)
+
     # Forward platform setups (let HA handle platform-specific exceptions)
     async def _options_updated(hass: HomeAssistant, updated_entry: ConfigEntry):
         await hass.config_entries.async_reload(updated_entry.entry_id)
@@ -65,5 +112,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        zbx = hass.data[DOMAIN].pop(entry.entry_id)
+        if not any(other.client is zbx.client for other in hass.data[DOMAIN].values()):
+            # Last entry of this server: drop the shared client
+            hass.data[DATA_CLIENTS].pop(
+                (tuple(endpoint.url for endpoint in zbx.client.endpoints), zbx.client.api_token), None
+            )
+            await zbx.async_close()
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_PROFILE_CYCLE)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the persisted snapshot of a removed entry."""
+    await ZbxSnapshotStore(hass, entry.entry_id).async_remove()
@@ -1,11 +1,14 @@
 """Config flow for zabbix_evt_sensors integration."""
 from __future__ import annotations
 
+from collections import Counter
 import logging
 from typing import Any
 
+import aiohttp
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.components import webhook
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_API_TOKEN,
@@ -15,20 +18,40 @@ from homeassistant.const import (
     CONF_SCAN_INTERVAL,
     CONF_SSL,
     CONF_STOP,
+    CONF_WEBHOOK_ID,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResult
-from requests.exceptions import ConnectionError
-from zabbix_utils.exceptions import APIRequestError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import SelectOptionDict, SelectSelector, SelectSelectorConfig
+from zabbix_utils.exceptions import APIRequestError, ProcessingError
 
-from .const import (DEFAULT_NAME,
+from .const import (DEFAULT_FULL_SYNC_INTERVAL,
+                    DEFAULT_HOST_METADATA_INTERVAL,
+                    DEFAULT_MAX_SCAN_INTERVAL,
+                    DEFAULT_NAME,
+                    DEFAULT_PAGE_SIZE,
+                    DEFAULT_REQUEST_TIMEOUT,
+                    DISCOVERED_TAGS_MAX,
                     DOMAIN,
+                    ZBX_ADD_TAGS_MANUALLY,
+                    ZBX_EXCLUDE_MAINTENANCE,
+                    ZBX_FRONTENDS,
+                    ZBX_FULL_SYNC_INTERVAL,
                     ZBX_HOST_KEY,
+                    ZBX_HOST_METADATA_INTERVAL,
+                    ZBX_HOSTGROUP_LIST,
+                    ZBX_HOSTGROUPS_KEY,
+                    ZBX_MAX_SCAN_INTERVAL,
+                    ZBX_PAGE_SIZE,
+                    ZBX_REQUEST_TIMEOUT,
                     ZBX_SENSOR_PREFIX,
                     ZBX_PROBLEMS_KEY,
+                    ZBX_PUSH,
                     ZBX_SERVICES_KEY,
+                    ZBX_SUMMARY_ATTRIBUTES,
                     ZBX_TAG_VALUE_LIST)
-from .zabbix import Zbx
+from .zabbix import AsyncZbx, ZbxClient, api_urls
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -41,13 +64,13 @@ STEP_SENSOR_TAGGED_PROBLEM_DATA_SCHEMA = vol.Schema(
 )
 
 
-async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> None:
-    """Validate the user input allows us to connect."""
-
-    zbx = await hass.async_add_executor_job(
-        Zbx, data[CONF_HOST], data[CONF_API_TOKEN], data[CONF_PATH], data[CONF_PORT], data[CONF_SSL]
-    )
-    await hass.async_add_executor_job(zbx.services)
+async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> ZbxClient:
+    """Validate the user input allows us to connect; return the connected client."""
+    # Login plus user.checkAuthentication; no data is fetched
+    urls = api_urls(data[CONF_HOST], data[CONF_PATH], data[CONF_PORT], data[CONF_SSL], data.get(ZBX_FRONTENDS, ""))
+    client = ZbxClient(urls, data[CONF_API_TOKEN], timeout=data.get(ZBX_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT))
+    await client.async_connect(async_get_clientsession(hass, verify_ssl=False))
+    return client
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -66,6 +89,17 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                                          ZBX_SERVICES_KEY: True}
         self._is_reconfigure: bool = False
         self._reconfigure_entry: ConfigEntry | None = None
+        self._client: ZbxClient | None = None
+        # "tag:value" -> problem count, built once per flow
+        self._tag_index: Counter | None = None
+        # Names of host groups with monitored hosts, fetched once per flow
+        self._host_groups: list[str] | None = None
+
+    def _host_entries(self, host: str) -> list[ConfigEntry]:
+        return [
+            entry for entry in self._async_current_entries(include_ignore=False)
+            if entry.data.get(ZBX_HOST_KEY, {}).get(CONF_HOST) == host
+        ]
 
     def _build_user_schema(self) -> vol.Schema:
         host_cfg = self.cfg_data.get(ZBX_HOST_KEY, {})
@@ -75,14 +109,26 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         default_token = host_cfg.get(CONF_API_TOKEN, "")
         default_ssl = host_cfg.get(CONF_SSL, True)
         default_scan = host_cfg.get(CONF_SCAN_INTERVAL, 3)
+        default_max_scan = host_cfg.get(ZBX_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+        default_full_sync = host_cfg.get(ZBX_FULL_SYNC_INTERVAL, DEFAULT_FULL_SYNC_INTERVAL)
+        default_page_size = host_cfg.get(ZBX_PAGE_SIZE, DEFAULT_PAGE_SIZE)
+        default_request_timeout = host_cfg.get(ZBX_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+        default_frontends = host_cfg.get(ZBX_FRONTENDS, "")
+        default_host_metadata = host_cfg.get(ZBX_HOST_METADATA_INTERVAL, DEFAULT_HOST_METADATA_INTERVAL)
         return vol.Schema(
             {
                 vol.Required(CONF_HOST, default=default_host): str,
                 vol.Optional(CONF_PATH, default=default_path): str,
                 vol.Required(CONF_PORT, default=default_port): int,
+                vol.Optional(ZBX_FRONTENDS, default=default_frontends): str,
                 vol.Required(CONF_API_TOKEN, default=default_token): str,
                 vol.Required(CONF_SSL, default=default_ssl): bool,
-                vol.Optional(CONF_SCAN_INTERVAL, default=default_scan): int
+                vol.Optional(CONF_SCAN_INTERVAL, default=default_scan): int,
+                vol.Optional(ZBX_MAX_SCAN_INTERVAL, default=default_max_scan): int,
+                vol.Optional(ZBX_FULL_SYNC_INTERVAL, default=default_full_sync): int,
+                vol.Optional(ZBX_PAGE_SIZE, default=default_page_size): vol.All(int, vol.Range(min=0)),
+                vol.Optional(ZBX_REQUEST_TIMEOUT, default=default_request_timeout): vol.All(int, vol.Range(min=1)),
+                vol.Optional(ZBX_HOST_METADATA_INTERVAL, default=default_host_metadata): int
             }
         )
 
@@ -90,13 +136,67 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         default_prefix = self.cfg_data.get(ZBX_SENSOR_PREFIX, "zabbix")
         default_services = self.cfg_data.get(ZBX_SERVICES_KEY, True)
         default_problems = self.cfg_data.get(ZBX_PROBLEMS_KEY, False)
+        default_push = self.cfg_data.get(ZBX_PUSH, False)
+        default_summary = self.cfg_data.get(ZBX_SUMMARY_ATTRIBUTES, False)
+        default_exclude_maintenance = self.cfg_data.get(ZBX_EXCLUDE_MAINTENANCE, False)
+        default_host_groups = self.cfg_data.get(ZBX_HOSTGROUPS_KEY, False)
         return vol.Schema(
             {
                 vol.Optional(ZBX_SENSOR_PREFIX, default=default_prefix): str,
                 vol.Required(ZBX_SERVICES_KEY, default=default_services): bool,
-                vol.Required(ZBX_PROBLEMS_KEY, default=default_problems): bool            }
+                vol.Required(ZBX_PROBLEMS_KEY, default=default_problems): bool,
+                vol.Required(ZBX_PUSH, default=default_push): bool,
+                vol.Required(ZBX_SUMMARY_ATTRIBUTES, default=default_summary): bool,
+                vol.Required(ZBX_EXCLUDE_MAINTENANCE, default=default_exclude_maintenance): bool,
+                vol.Required(ZBX_HOSTGROUPS_KEY, default=default_host_groups): bool
+            }
+        )
+
+    def _build_discovered_tags_schema(self) -> vol.Schema:
+        selected = self.cfg_data.get(ZBX_TAG_VALUE_LIST) or []
+        options = [
+            SelectOptionDict(value=key, label=f"{key} ({count})")
+            for key, count in self._tag_index.most_common(DISCOVERED_TAGS_MAX)
+        ]
+        offered = {option["value"] for option in options}
+        # Keep configured pairs selectable even if no current problem carries them
+        options.extend(SelectOptionDict(value=key, label=key) for key in selected if key not in offered)
+        return vol.Schema(
+            {
+                vol.Optional(ZBX_TAG_VALUE_LIST, default=selected): SelectSelector(
+                    SelectSelectorConfig(options=options, multiple=True, custom_value=True, sort=False)
+                ),
+                vol.Required(ZBX_ADD_TAGS_MANUALLY, default=False): bool
+            }
+        )
+
+    def _build_host_groups_schema(self) -> vol.Schema:
+        selected = self.cfg_data.get(ZBX_HOSTGROUP_LIST) or []
+        # Keep configured groups selectable even if Zabbix no longer has them
+        options = self._host_groups + [group for group in selected if group not in self._host_groups]
+        return vol.Schema(
+            {
+                vol.Optional(ZBX_HOSTGROUP_LIST, default=selected): SelectSelector(
+                    SelectSelectorConfig(options=options, multiple=True, custom_value=True, sort=False)
+                )
+            }
         )
 
+    def _async_zbx(self) -> AsyncZbx:
+        """Return an AsyncZbx for one-off queries on the flow's connected client."""
+        host_cfg = self.cfg_data[ZBX_HOST_KEY]
+        return AsyncZbx(host_cfg[CONF_HOST], host_cfg[CONF_API_TOKEN], host_cfg[CONF_PATH], host_cfg[CONF_PORT],
+                        host_cfg[CONF_SSL], page_size=host_cfg.get(ZBX_PAGE_SIZE, DEFAULT_PAGE_SIZE),
+                        client=self._client)
+
+    async def _async_build_tag_index(self) -> Counter:
+        """Count tag/value pairs of current and recent problems with a tags-only query."""
+        return await self._async_zbx().async_tag_index()
+
+    async def async_step_reauth(self, entry_data: dict[str, Any]) -> FlowResult:
+        """Ask for a new API token after Zabbix rejected the configured one."""
+        return await self.async_step_reconfigure()
+
     async def async_step_reconfigure(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Start reconfiguration for an existing entry."""
 
@@ -121,12 +221,26 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_PORT: host_cfg.get(CONF_PORT),
                 CONF_API_TOKEN: host_cfg.get(CONF_API_TOKEN),
                 CONF_SSL: host_cfg.get(CONF_SSL),
-                CONF_SCAN_INTERVAL: host_cfg.get(CONF_SCAN_INTERVAL)
+                CONF_SCAN_INTERVAL: host_cfg.get(CONF_SCAN_INTERVAL),
+                ZBX_MAX_SCAN_INTERVAL: host_cfg.get(ZBX_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+                ZBX_FULL_SYNC_INTERVAL: host_cfg.get(ZBX_FULL_SYNC_INTERVAL, DEFAULT_FULL_SYNC_INTERVAL),
+                ZBX_PAGE_SIZE: host_cfg.get(ZBX_PAGE_SIZE, DEFAULT_PAGE_SIZE),
+                ZBX_REQUEST_TIMEOUT: host_cfg.get(ZBX_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+                ZBX_FRONTENDS: host_cfg.get(ZBX_FRONTENDS, ""),
+                ZBX_HOST_METADATA_INTERVAL: host_cfg.get(ZBX_HOST_METADATA_INTERVAL, DEFAULT_HOST_METADATA_INTERVAL)
             },
             ZBX_SENSOR_PREFIX: existing.get(ZBX_SENSOR_PREFIX),
             ZBX_SERVICES_KEY: existing.get(ZBX_SERVICES_KEY),
-            ZBX_PROBLEMS_KEY: existing.get(ZBX_PROBLEMS_KEY)
+            ZBX_PROBLEMS_KEY: existing.get(ZBX_PROBLEMS_KEY),
+            ZBX_PUSH: existing.get(ZBX_PUSH, False),
+            ZBX_SUMMARY_ATTRIBUTES: existing.get(ZBX_SUMMARY_ATTRIBUTES, False),
+            ZBX_EXCLUDE_MAINTENANCE: existing.get(ZBX_EXCLUDE_MAINTENANCE, False),
+            ZBX_HOSTGROUPS_KEY: existing.get(ZBX_HOSTGROUPS_KEY, False),
+            ZBX_HOSTGROUP_LIST: list(existing.get(ZBX_HOSTGROUP_LIST, [])),
+            ZBX_TAG_VALUE_LIST: list(existing.get(ZBX_TAG_VALUE_LIST, []))
         }
+        if CONF_WEBHOOK_ID in existing:
+            self.cfg_data[CONF_WEBHOOK_ID] = existing[CONF_WEBHOOK_ID]
 
         # Continue with the normal user step, but with defaults prefilled
         return await self.async_step_user()
@@ -138,15 +252,18 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
         if user_input is not None:
             host_norm = user_input[CONF_HOST].strip().lower()
-            if not self._is_reconfigure:
+            if not self._is_reconfigure and not self._host_entries(host_norm):
+                # Further entries of a host get their unique ID from the sensor prefix in the next step
                 await self.async_set_unique_id(host_norm)
                 self._abort_if_unique_id_configured()
             user_input[CONF_HOST] = host_norm
             try:
-                await validate_input(self.hass, user_input)
+                self._client = await validate_input(self.hass, user_input)
             except APIRequestError:
                 errors["base"] = "invalid_auth"
-            except ConnectionError:
+            except ValueError:
+                errors["base"] = "invalid_frontends"
+            except (ProcessingError, aiohttp.ClientError, TimeoutError):
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
@@ -166,17 +283,80 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle the sensors services step."""
         errors: dict[str, str] = {}
         if user_input is not None:
+            if not self._is_reconfigure and self.unique_id is None:
+                host = self.cfg_data[ZBX_HOST_KEY][CONF_HOST]
+                prefix = user_input[ZBX_SENSOR_PREFIX]
+                if any(entry.data.get(ZBX_SENSOR_PREFIX) == prefix for entry in self._host_entries(host)):
+                    return self.async_abort(reason="already_configured")
+                await self.async_set_unique_id(f"{host}_{prefix}")
+                self._abort_if_unique_id_configured()
             self.cfg_data[ZBX_SENSOR_PREFIX] = user_input[ZBX_SENSOR_PREFIX]
             self.cfg_data[ZBX_SERVICES_KEY] = user_input[ZBX_SERVICES_KEY]
             self.cfg_data[ZBX_PROBLEMS_KEY] = user_input[ZBX_PROBLEMS_KEY]
+            self.cfg_data[ZBX_PUSH] = user_input[ZBX_PUSH]
+            self.cfg_data[ZBX_SUMMARY_ATTRIBUTES] = user_input[ZBX_SUMMARY_ATTRIBUTES]
+            self.cfg_data[ZBX_EXCLUDE_MAINTENANCE] = user_input[ZBX_EXCLUDE_MAINTENANCE]
+            self.cfg_data[ZBX_HOSTGROUPS_KEY] = user_input[ZBX_HOSTGROUPS_KEY]
+            if self.cfg_data[ZBX_PUSH] and not self.cfg_data.get(CONF_WEBHOOK_ID):
+                self.cfg_data[CONF_WEBHOOK_ID] = webhook.async_generate_id()
+            if self.cfg_data[ZBX_PROBLEMS_KEY] and self.cfg_data[ZBX_HOSTGROUPS_KEY]:
+                return await self.async_step_sensors_host_groups()
             if self.cfg_data[ZBX_PROBLEMS_KEY]:
-                return await self.async_step_sensors_tagged_problems()
+                return await self.async_step_sensors_discovered_tags()
             return await self.async_end_flow()
 
         return self.async_show_form(
                 step_id="sensors", data_schema=self._build_sensor_schema(), errors=errors
         )
 
+    async def async_step_sensors_host_groups(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle selecting the host groups to create sensors for."""
+        errors: dict[str, str] = {}
+        if self._host_groups is None:
+            try:
+                self._host_groups = await self._async_zbx().async_host_groups()
+            except (APIRequestError, ProcessingError, aiohttp.ClientError, TimeoutError) as err:
+                _LOGGER.warning("Host group discovery failed, groups must be typed in: %s", err)
+                self._host_groups = []
+
+        if user_input is not None:
+            self.cfg_data[ZBX_HOSTGROUP_LIST] = list(user_input.get(ZBX_HOSTGROUP_LIST, []))
+            if self.cfg_data[ZBX_HOSTGROUP_LIST]:
+                return await self.async_step_sensors_discovered_tags()
+            errors["base"] = "host_group_required"
+
+        return self.async_show_form(
+            step_id="sensors_host_groups", data_schema=self._build_host_groups_schema(), errors=errors
+        )
+
+    async def async_step_sensors_discovered_tags(
+            self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle selecting problem tags from those found on the server."""
+        errors: dict[str, str] = {}
+        if self._tag_index is None:
+            try:
+                self._tag_index = await self._async_build_tag_index()
+            except (APIRequestError, ProcessingError, aiohttp.ClientError, TimeoutError) as err:
+                _LOGGER.warning("Problem tag discovery failed, falling back to manual entry: %s", err)
+                self._tag_index = Counter()
+        if not self._tag_index and not self.cfg_data.get(ZBX_TAG_VALUE_LIST):
+            return await self.async_step_sensors_tagged_problems()
+
+        if user_input is not None:
+            self.cfg_data[ZBX_TAG_VALUE_LIST] = list(user_input.get(ZBX_TAG_VALUE_LIST, []))
+            if user_input.get(ZBX_ADD_TAGS_MANUALLY):
+                return await self.async_step_sensors_tagged_problems()
+            if self.cfg_data[ZBX_TAG_VALUE_LIST]:
+                return await self.async_end_flow()
+            errors["base"] = "tag_required"
+
+        return self.async_show_form(
+            step_id="sensors_discovered_tags", data_schema=self._build_discovered_tags_schema(), errors=errors
+        )
+
     async def async_step_sensors_tagged_problems(
             self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
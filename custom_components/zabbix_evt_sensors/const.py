@@ -7,3 +7,31 @@ ZBX_SENSOR_PREFIX = "zabbix"
 ZBX_PROBLEMS_KEY = "prbs"
 ZBX_SERVICES_KEY = "svcs"
 ZBX_TAG_VALUE_LIST = "zbx_tag_value_list"
+ZBX_FULL_SYNC_INTERVAL = "full_sync_interval"
+DEFAULT_FULL_SYNC_INTERVAL = 300
+ZBX_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MAX_SCAN_INTERVAL = 60
+DEFAULT_TOPOLOGY_INTERVAL = 3600
+ZBX_PAGE_SIZE = "page_size"
+DEFAULT_PAGE_SIZE = 5000
+SERVICE_PROFILE_CYCLE = "profile_cycle"
+ZBX_PUSH = "push"
+ZBX_SUMMARY_ATTRIBUTES = "summary_attributes"
+SUMMARY_TOP_EVENTS = 10
+SERVICE_GET_EVENTS = "get_events"
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 30
+DATA_CLIENTS = f"{DOMAIN}_clients"
+ZBX_REQUEST_TIMEOUT = "request_timeout"
+ZBX_FRONTENDS = "frontends"
+ZBX_ADD_TAGS_MANUALLY = "add_manually"
+DISCOVERED_TAGS_MAX = 500
+DEFAULT_REQUEST_TIMEOUT = 10
+MAX_REFRESH_DURATION = 60
+STATS_BUFFER_SIZE = 4096
+STATS_WINDOW = 3600
+ZBX_HOSTGROUPS_KEY = "hgrps"
+ZBX_HOSTGROUP_LIST = "zbx_hostgroup_list"
+ZBX_EXCLUDE_MAINTENANCE = "exclude_maintenance"
+ZBX_HOST_METADATA_INTERVAL = "host_metadata_interval"
+DEFAULT_HOST_METADATA_INTERVAL = 300
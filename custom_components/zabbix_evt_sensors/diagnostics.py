@@ -0,0 +1,40 @@
+"""Diagnostics support for the zabbix_evt_sensors integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_API_TOKEN, CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_API_TOKEN, CONF_WEBHOOK_ID}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return config entry settings, cache counters and the last poll cycle profiles."""
+    zbx = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "api_version": zbx.api_version,
+        "host_cache": {
+            "hits": zbx.host_cache.hits,
+            "misses": zbx.host_cache.misses,
+            "entries": len(zbx.host_cache),
+        },
+        "host_metadata": None if zbx.host_metadata is None else {
+            "updates": zbx.host_metadata.updates,
+            "hosts": len(zbx.host_metadata),
+            "groups": len(zbx.host_metadata.groups),
+            "in_maintenance": sorted(zbx.host_metadata.in_maintenance),
+        },
+        "client": {
+            "requests": zbx.client.requests,
+            "coalesced": zbx.client.coalesced,
+            "circuit_open": zbx.client.circuit_open,
+            "endpoints": [endpoint.as_dict() for endpoint in zbx.client.endpoints],
+        },
+        "metrics": zbx.metrics.as_dict(),
+    }
@@ -0,0 +1,177 @@
+"""Per-phase timing of Zabbix poll cycles.
+
+PollMetrics records wall time, response bytes and item counts for each
+phase of a refresh (API calls, index building, entity writes) and keeps the
+last cycles for rolling percentiles and the diagnostics download.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import cProfile
+import io
+import pstats
+import time
+
+PHASE_PROBLEM_GET = "problem.get"
+PHASE_EVENT_HOSTS = "event.get hosts"
+PHASE_EVENT_POLL = "event.get events"
+PHASE_HOST_GET = "host.get"
+PHASE_SERVICE_GET = "service.get"
+PHASE_SERVICE_STATUS = "service.get status"
+PHASE_INDEX = "index"
+PHASE_ENTITY_WRITES = "entity writes"
+PHASE_REFRESH = "refresh"
+
+PHASES = (
+    PHASE_PROBLEM_GET,
+    PHASE_EVENT_HOSTS,
+    PHASE_EVENT_POLL,
+    PHASE_HOST_GET,
+    PHASE_SERVICE_GET,
+    PHASE_SERVICE_STATUS,
+    PHASE_INDEX,
+    PHASE_ENTITY_WRITES,
+    PHASE_REFRESH,
+)
+
+# Phase record of the running task, so concurrent service and problem fetches count their own bytes
+_current_phase = ContextVar("zbx_current_phase", default=None)
+
+
+class PhaseStats:
+    """Totals of one phase within a cycle."""
+
+    __slots__ = ("ms", "bytes", "items", "calls")
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.ms = 0.0
+        self.bytes = 0
+        self.items = 0
+        self.calls = 0
+
+    def as_dict(self):
+        """Serialize for diagnostics."""
+        return {"ms": round(self.ms, 3), "bytes": self.bytes, "items": self.items, "calls": self.calls}
+
+
+class CycleProfile:
+    """Phase totals of one refresh cycle."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.started = time.time()
+        self.phases = {}
+
+    def phase(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        return stats
+
+    def as_dict(self):
+        """Serialize for diagnostics."""
+        return {
+            "started": self.started,
+            "phases": {name: stats.as_dict() for name, stats in self.phases.items()},
+        }
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PollMetrics:
+    """Recorder of the last history cycle profiles."""
+
+    def __init__(self, history=50) -> None:
+        """Initialize the class."""
+        self.cycles = deque(maxlen=history)
+        self.current = CycleProfile()
+        self.last_profile = None
+        self.profile_next = False
+        self._profiler = None
+
+    def start_cycle(self):
+        """Begin a new cycle, under cProfile if one was requested."""
+        self.current = CycleProfile()
+        if self.profile_next:
+            self.profile_next = False
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def end_cycle(self):
+        """Store the current cycle profile."""
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+            self.last_profile = out.getvalue()
+            self._profiler = None
+        self.cycles.append(self.current)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase; yields its PhaseStats for item counts."""
+        stats = self.current.phase(name)
+        token = _current_phase.set(stats)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.ms += (time.perf_counter() - start) * 1000
+            stats.calls += 1
+            _current_phase.reset(token)
+
+    @staticmethod
+    def add_bytes(count):
+        """Attribute response bytes to the phase of the running task."""
+        stats = _current_phase.get()
+        if stats is not None:
+            stats.bytes += count
+
+    def percentiles(self, name):
+        """Return rolling (p50, p95) wall time in ms of a phase, or None without samples."""
+        values = [cycle.phases[name].ms for cycle in self.cycles if name in cycle.phases]
+        if not values:
+            return None
+        return _percentile(values, 0.5), _percentile(values, 0.95)
+
+    def last(self, name):
+        """Return the PhaseStats of a phase in the last completed cycle."""
+        for cycle in reversed(self.cycles):
+            if name in cycle.phases:
+                return cycle.phases[name]
+        return None
+
+    def as_dict(self):
+        """Serialize for diagnostics."""
+        summary = {}
+        for name in PHASES:
+            percentiles = self.percentiles(name)
+            if percentiles is not None:
+                summary[name] = {"p50_ms": round(percentiles[0], 3), "p95_ms": round(percentiles[1], 3)}
+        return {
+            "summary": summary,
+            "cycles": [cycle.as_dict() for cycle in self.cycles],
+            "cprofile": self.last_profile,
+        }
+
+
+class MeteredSession:
+    """aiohttp session proxy that reports response body sizes to PollMetrics."""
+
+    def __init__(self, session) -> None:
+        """Initialize the class."""
+        self._session = session
+
+    def __getattr__(self, name):
+        """Delegate everything else to the wrapped session."""
+        return getattr(self._session, name)
+
+    async def post(self, *args, **kwargs):
+        """Post and read the body, which aiohttp caches for the later json() call."""
+        resp = await self._session.post(*args, **kwargs)
+        PollMetrics.add_bytes(len(await resp.read()))
+        return resp
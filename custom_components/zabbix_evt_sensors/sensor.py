@@ -2,24 +2,71 @@
 
 from __future__ import annotations
 
+import asyncio
 import datetime
+from functools import partial
+import heapq
+import json
 import logging
+import random
+import time
 
-from homeassistant.components.sensor import SensorEntity
+import aiohttp
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_SCAN_INTERVAL
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import CONF_SCAN_INTERVAL, CONF_WEBHOOK_ID, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, SupportsResponse, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, ServiceValidationError
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers import entity_platform
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
+    UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
+from zabbix_utils.exceptions import APIRequestError, ProcessingError
 
-from .const import DOMAIN, ZBX_HOST_KEY, ZBX_SENSOR_PREFIX, ZBX_PROBLEMS_KEY, ZBX_SERVICES_KEY, ZBX_TAG_VALUE_LIST
+from .const import (
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DOMAIN,
+    MAX_REFRESH_DURATION,
+    SERVICE_GET_EVENTS,
+    STATS_BUFFER_SIZE,
+    STATS_WINDOW,
+    SUMMARY_TOP_EVENTS,
+    ZBX_HOST_KEY,
+    ZBX_HOSTGROUP_LIST,
+    ZBX_HOSTGROUPS_KEY,
+    ZBX_MAX_SCAN_INTERVAL,
+    ZBX_SENSOR_PREFIX,
+    ZBX_PROBLEMS_KEY,
+    ZBX_PUSH,
+    ZBX_SERVICES_KEY,
+    ZBX_SUMMARY_ATTRIBUTES,
+    ZBX_TAG_VALUE_LIST,
+)
+from .metrics import PHASE_ENTITY_WRITES, PHASE_REFRESH, PHASES
+from .snapshot import ZbxSnapshotStore
+from .stats import TransitionBuffer
+from .zabbix import ZbxAuthError, fingerprint
 
 _LOGGER = logging.getLogger(__name__)
 
+# Relative random spread applied to every poll interval so entries drift apart
+POLL_JITTER = 0.1
+
+# Fields a pushed problem event must carry; recoveries need only eventid and value
+PUSH_PROBLEM_FIELDS = ("eventid", "value", "name", "severity")
+
+# Webhook events queued while no complete problem table exists; beyond that a full snapshot reconciles
+PUSH_QUEUE_MAX = 1000
+
 
 async def async_setup_entry(
         hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
@@ -28,6 +75,11 @@ async def async_setup_entry(
     _LOGGER.info("Instantiating DataUpdateCoordinator")
     zbx_config = hass.data[DOMAIN][entry.entry_id]
     scan_interval = entry.data[ZBX_HOST_KEY][CONF_SCAN_INTERVAL]
+    max_scan_interval = entry.data[ZBX_HOST_KEY].get(ZBX_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+    push = entry.data.get(ZBX_PROBLEMS_KEY) and entry.data.get(ZBX_PUSH)
+    if push:
+        # Problems arrive by webhook; polling only reconciles missed events
+        scan_interval = max_scan_interval
 
     coordinator = ZabbixUpdateCoordinator(
         hass=hass,
@@ -35,63 +87,241 @@ async def async_setup_entry(
         zbx=zbx_config,
         name="Zabbix Data Coordinator",
         update_interval=datetime.timedelta(seconds=scan_interval),
+        max_update_interval=datetime.timedelta(seconds=max(scan_interval, max_scan_interval)),
+        store=ZbxSnapshotStore(hass, entry.entry_id),
+        # Entries sharing a host are told apart by their unique ID; the first one keeps the host
+        unique_base=entry.unique_id or zbx_config.host,
     )
-    await coordinator.async_config_entry_first_refresh()
+    if not await coordinator.async_restore():
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # Sensors start from the snapshot; login and the first live poll happen in the background
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} first refresh")
+
+    if push:
+        webhook_id = entry.data[CONF_WEBHOOK_ID]
+        webhook.async_register(
+            hass, DOMAIN, f"Zabbix problems {coordinator.zbx.host}", webhook_id,
+            partial(_async_handle_webhook, coordinator), local_only=True
+        )
+        entry.async_on_unload(partial(webhook.async_unregister, hass, webhook_id))
+        _LOGGER.info("Receiving Zabbix problem events at %s", webhook.async_generate_url(hass, webhook_id))
 
     prefix = entry.data.get(ZBX_SENSOR_PREFIX)
+    summary = entry.data.get(ZBX_SUMMARY_ATTRIBUTES, False)
 
     sensors = []
 
     if entry.data.get(ZBX_SERVICES_KEY):
         sensors.extend(
-            ZabbixServiceSensor(coordinator, svc, prefix)
-            for svc in coordinator.data[ZBX_SERVICES_KEY]
+            _async_track_sensors(entry, coordinator, async_add_entities, ZabbixServiceSensor, prefix, summary)
         )
 
     if entry.data.get(ZBX_PROBLEMS_KEY):
         sensors.extend(
-            ZabbixProblemSensor(coordinator, prob, prefix)
+            ZabbixProblemSensor(coordinator, prob, prefix, summary)
             for prob in entry.data[ZBX_TAG_VALUE_LIST]
         )
+        sensors.extend(
+            trend_sensor(coordinator, prob, prefix)
+            for prob in entry.data[ZBX_TAG_VALUE_LIST]
+            for trend_sensor in (ZabbixProblemRateSensor, ZabbixProblemMttrSensor)
+        )
+        if entry.data.get(ZBX_HOSTGROUPS_KEY):
+            sensors.extend(
+                ZabbixHostGroupSensor(coordinator, group, prefix, summary)
+                for group in entry.data.get(ZBX_HOSTGROUP_LIST, [])
+            )
+
+    # Timing sensors go on the problem device if there is one, else on the service device
+    timing_sensor_type = ZabbixProblemSensor if entry.data.get(ZBX_PROBLEMS_KEY) else ZabbixServiceSensor
+    sensors.extend(
+        ZabbixPhaseSensor(coordinator, phase, timing_sensor_type.zabbix_sensor_type_name, prefix)
+        for phase in PHASES
+    )
 
     async_add_entities(sensors)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_GET_EVENTS, {}, "async_get_events", supports_response=SupportsResponse.ONLY
+    )
+
+
+async def _gather_or_cancel(*aws):
+    """Run awaitables concurrently like asyncio.gather; if one fails, cancel and await the others.
+
+    Nothing of a failed poll may keep running after the poll lock is released.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _async_track_sensors(entry, coordinator, async_add_entities, sensor_cls, prefix, summary):
+    """Return sensors for the names in the data of sensor_cls and add sensors for names that appear later.
+
+    Sensors of names that vanish turn unavailable.
+    """
+    type_key = sensor_cls.zabbix_sensor_type_key
+    known = set(coordinator.data[type_key])
+
+    @callback
+    def _async_add_new_sensors() -> None:
+        new_names = coordinator.data[type_key].keys() - known
+        if new_names:
+            _LOGGER.info("Discovered Zabbix %s sensors: %s", sensor_cls.zabbix_sensor_type_name,
+                         ", ".join(sorted(new_names)))
+            known.update(new_names)
+            async_add_entities(sensor_cls(coordinator, name, prefix, summary) for name in new_names)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_sensors))
+    return [sensor_cls(coordinator, name, prefix, summary) for name in known]
+
+
+async def _async_handle_webhook(coordinator, hass, webhook_id, request) -> web.Response:
+    """Accept one pushed event or a list of them."""
+    try:
+        events = await request.json()
+    except ValueError:
+        return web.Response(status=400, text="Invalid JSON")
+    if isinstance(events, dict):
+        events = [events]
+    if not isinstance(events, list):
+        return web.Response(status=400, text="Expected an event object or a list of them")
+    # Validate the whole batch before applying any of it
+    for event in events:
+        if error := _push_event_error(event):
+            return web.Response(status=400, text=error)
+    coordinator.async_push_events(events)
+    return web.Response(status=200)
+
+
+def _push_event_error(event):
+    """Return why a pushed event cannot be applied, None if it is valid; decodes JSON string tags in place."""
+    if not isinstance(event, dict):
+        return "Events must be objects"
+    problem = str(event.get("value")) == "1"
+    required = PUSH_PROBLEM_FIELDS if problem else PUSH_PROBLEM_FIELDS[:2]
+    if missing := [field for field in required if field not in event]:
+        return f"Missing fields: {', '.join(missing)}"
+    if not problem:
+        return None
+    if _int_field(event, "severity") not in range(6):
+        return "Severity must be an integer from 0 to 5"
+    if "clock" in event and _int_field(event, "clock") is None:
+        return "Invalid clock"
+    if not isinstance(event.get("host") or "", str):
+        return "Invalid host"
+    tags = event.get("tags") or []
+    if isinstance(tags, str):
+        try:
+            tags = event["tags"] = json.loads(tags)
+        except ValueError:
+            return "Invalid tags"
+    if not isinstance(tags, list) or not all(
+            isinstance(tag, dict) and isinstance(tag.get("tag"), str) and isinstance(tag.get("value"), str)
+            for tag in tags):
+        return "Tags must be a list of objects with string tag and value"
+    return None
+
+
+def _int_field(event, field):
+    """Return a pushed event field as an int, None if it is missing, empty or not an integer."""
+    try:
+        return int(event[field])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+
+
+def _summary_attributes(events):
+    """Return count per severity, the oldest and the most severe events."""
+    severities = {}
+    for zbx_event in events:
+        severities[zbx_event.severity] = severities.get(zbx_event.severity, 0) + 1
+    # Event IDs grow with time, so the lowest one is the oldest problem
+    oldest = min(events, key=lambda e: int(e.eid), default=None)
+    top = heapq.nlargest(SUMMARY_TOP_EVENTS, events, key=lambda e: (e.severity, -int(e.eid)))
+    return {
+        "count": len(events),
+        "severities": dict(sorted(severities.items(), reverse=True)),
+        "oldest": None if oldest is None else oldest.as_dict(),
+        "top_events": [zbx_event.as_dict() for zbx_event in top],
+    }
+
+
+def _device_info(coordinator, sensor_type_name, prefix) -> DeviceInfo:
+    return DeviceInfo(
+        identifiers={(DOMAIN, f'{coordinator.unique_base}_{sensor_type_name}')},
+        name=f'{prefix} {sensor_type_name}',
+        configuration_url=coordinator.zbx.url,
+        manufacturer="Zabbix SIA",
+        sw_version=str(coordinator.zbx.api_version),
+    )
+
 
 class ZabbixSensor(CoordinatorEntity, SensorEntity):
-    """Zabbix Problem Sensor."""
+    """Zabbix Problem Sensor.
+
+    With summary set the attributes hold per severity counts, the oldest
+    and the most severe events only; the full list is returned by the
+    get_events service.
+    """
 
     _attr_has_entity_name = True
     _attr_icon = "mdi:alpha-z-box"
     _attr_name = None
+    # Bounded, but still rewritten on every state change; keep it out of the recorder
+    _unrecorded_attributes = frozenset({"top_events"})
     zabbix_sensor_type_name = None
     zabbix_sensor_type_key = None
+    unique_id_prefix = ""
 
-    def __init__(self, coordinator, zbx_evt, prefix) -> None:
+    def __init__(self, coordinator, zbx_evt, prefix, summary=False) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(self.zabbix_sensor_type_key, zbx_evt))
+        self._summary = summary
         self._attr_name = zbx_evt
-        self._attr_unique_id = f"zbx_{coordinator.zbx.host}_{self._attr_name}"
+        self._attr_unique_id = f"zbx_{coordinator.unique_base}_{self.unique_id_prefix}{self._attr_name}"
         self._attr_native_value = None
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f'{coordinator.zbx.host}_{self.zabbix_sensor_type_name}')},
-            name=f'{prefix} {self.zabbix_sensor_type_name}',
-            configuration_url=coordinator.zbx.url,
-            manufacturer="Zabbix SIA",
-            sw_version=str(coordinator.zbx.api_version),
-        )
+        self._attr_device_info = _device_info(coordinator, self.zabbix_sensor_type_name, prefix)
         self._attr_should_poll = False
+        # The coordinator only notifies on change, so take the initial state from its data now
+        self._update_from_data()
         _LOGGER.debug("Created Zabbix %s sensor: %s", self.zabbix_sensor_type_name, self._attr_unique_id)
 
+    def _events(self):
+        return self.coordinator.data[self.zabbix_sensor_type_key].get(self._attr_name, [])
+
+    def _update_from_data(self) -> None:
+        """Set state and attributes from coordinator data."""
+        events = self._events()
+        if self._summary:
+            self._attr_extra_state_attributes = _summary_attributes(events)
+        else:
+            self._attr_extra_state_attributes = {
+                "events": {zbx_event.host: zbx_event.as_dict() for zbx_event in events}
+            }
+        if self.coordinator.stale:
+            last_live = self.coordinator.last_live
+            self._attr_extra_state_attributes["stale"] = True
+            self._attr_extra_state_attributes["last_update"] = last_live.isoformat() if last_live else None
+        self._attr_native_value = max((e.severity for e in events), default=-1)
+
+    async def async_get_events(self):
+        """Return every event of the sensor, for the get_events service."""
+        return {"events": [zbx_event.as_dict() for zbx_event in self._events()]}
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         _LOGGER.debug("Updating entity %s state", self.name)
-
-        events = self.coordinator.data[self.zabbix_sensor_type_key].get(self._attr_name, [])
-        self._attr_extra_state_attributes = {
-            "events": {zbx_event.host: vars(zbx_event) for zbx_event in events}
-        }
-        self._attr_native_value = max((e.severity for e in events), default=-1)
+        self._update_from_data()
         self.async_write_ha_state()
 
 
@@ -101,6 +331,26 @@ class ZabbixServiceSensor(ZabbixSensor):
     zabbix_sensor_type_name = "Service"
     zabbix_sensor_type_key = ZBX_SERVICES_KEY
 
+    @property
+    def available(self) -> bool:
+        """Return False once the service is gone from Zabbix."""
+        return super().available and self._attr_name in self.coordinator.data[ZBX_SERVICES_KEY]
+
+
+class ZabbixHostGroupSensor(ZabbixSensor):
+    """Problems matched by the configured tags on hosts of one configured host group."""
+
+    zabbix_sensor_type_name = "Host group"
+    zabbix_sensor_type_key = ZBX_HOSTGROUPS_KEY
+
+    # Keeps unique IDs apart from problem tags of the same name
+    unique_id_prefix = "hostgroup_"
+
+    @property
+    def available(self) -> bool:
+        """Return False once the host group is gone from Zabbix."""
+        return super().available and self._attr_name in self.coordinator.data[ZBX_HOSTGROUPS_KEY]
+
 
 class ZabbixProblemSensor(ZabbixSensor):
     """Zabbix Problem Sensor."""
@@ -109,8 +359,131 @@ class ZabbixProblemSensor(ZabbixSensor):
     zabbix_sensor_type_key = ZBX_PROBLEMS_KEY
 
 
+class ZabbixEventlessSensor(CoordinatorEntity, SensorEntity):
+    """Base of sensors derived from coordinator state rather than Zabbix events."""
+
+    _attr_has_entity_name = True
+
+    async def async_get_events(self):
+        """Reject get_events, which targets every sensor of the integration."""
+        raise ServiceValidationError(f"{self.entity_id} has no Zabbix events")
+
+
+class ZabbixPhaseSensor(ZabbixEventlessSensor):
+    """Diagnostic sensor with the rolling p95 wall time of one poll phase."""
+
+    _attr_icon = "mdi:timer-outline"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator, phase, sensor_type_name, prefix) -> None:
+        """Initialize the sensor."""
+        # No context: the coordinator notifies context-less listeners after every refresh
+        super().__init__(coordinator)
+        self._phase = phase
+        self._attr_name = f"Poll {phase} p95"
+        self._attr_unique_id = f"zbx_{coordinator.unique_base}_timing_{phase}"
+        self._attr_device_info = _device_info(coordinator, sensor_type_name, prefix)
+        self._attr_should_poll = False
+
+    @property
+    def native_value(self):
+        """Return the rolling p95 in ms."""
+        percentiles = self.coordinator.zbx.metrics.percentiles(self._phase)
+        return None if percentiles is None else round(percentiles[1], 3)
+
+    @property
+    def extra_state_attributes(self):
+        """Return p50 and the last cycle's figures."""
+        metrics = self.coordinator.zbx.metrics
+        percentiles = metrics.percentiles(self._phase)
+        last = metrics.last(self._phase)
+        return {
+            "p50_ms": None if percentiles is None else round(percentiles[0], 3),
+            "last": None if last is None else last.as_dict(),
+        }
+
+
+class ZabbixTrendSensor(ZabbixEventlessSensor):
+    """Windowed statistic of one problem sensor, from the coordinator's transition buffer."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    trend_name = None
+
+    def __init__(self, coordinator, zbx_evt, prefix) -> None:
+        """Initialize the sensor."""
+        # No context: the window slides, so the value can change on any refresh
+        super().__init__(coordinator)
+        self._zbx_evt = zbx_evt
+        self._attr_name = f"{zbx_evt} {self.trend_name}"
+        self._attr_unique_id = f"zbx_{coordinator.unique_base}_{zbx_evt}_{self.trend_name.lower()}"
+        self._attr_device_info = _device_info(coordinator, ZabbixProblemSensor.zabbix_sensor_type_name, prefix)
+        self._attr_should_poll = False
+        self._update_from_trend()
+
+    def _trend(self):
+        """Return (opened, resolved, mean seconds to resolve or None) of the sensor's tag."""
+        return self.coordinator.trends.get(self._zbx_evt, (0, 0, None))
+
+    def _update_from_trend(self) -> None:
+        """Set the attributes of every trend sensor; subclasses add their value."""
+        self._attr_extra_state_attributes = {
+            "window_seconds": STATS_WINDOW,
+            # More transitions than the buffer holds happened within the window
+            "truncated": self.coordinator.trends_truncated,
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the windowed value moved."""
+        value = self._attr_native_value, self.extra_state_attributes
+        self._update_from_trend()
+        if (self._attr_native_value, self.extra_state_attributes) != value:
+            self.async_write_ha_state()
+
+
+class ZabbixProblemRateSensor(ZabbixTrendSensor):
+    """Problems opened within the statistics window; resolved ones as an attribute."""
+
+    _attr_icon = "mdi:chart-line"
+    _attr_native_unit_of_measurement = "problems"
+    trend_name = "opened"
+
+    def _update_from_trend(self) -> None:
+        """Set the opened count, with the resolved count as an attribute."""
+        super()._update_from_trend()
+        opened, resolved, _ = self._trend()
+        self._attr_native_value = opened
+        self._attr_extra_state_attributes["resolved"] = resolved
+
+
+class ZabbixProblemMttrSensor(ZabbixTrendSensor):
+    """Mean time to resolve the problems resolved within the statistics window."""
+
+    _attr_icon = "mdi:timer-check-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_unit_of_measurement = UnitOfTime.MINUTES
+    trend_name = "MTTR"
+
+    def _update_from_trend(self) -> None:
+        """Set the mean time to resolve in seconds."""
+        super()._update_from_trend()
+        mttr = self._trend()[2]
+        self._attr_native_value = None if mttr is None else round(mttr)
+
+
 class ZabbixUpdateCoordinator(DataUpdateCoordinator):
-    """Zabbix DataUpdateCoordinator used to retrieve data for all sensors at once."""
+    """Zabbix DataUpdateCoordinator used to retrieve data for all sensors at once.
+
+    The poll interval adapts between update_interval and max_update_interval:
+    it doubles after each refresh without changes and drops back to the
+    minimum as soon as a sensor changes.
+    """
 
     def __init__(
             self,
@@ -119,13 +492,213 @@ class ZabbixUpdateCoordinator(DataUpdateCoordinator):
             zbx,
             name: str = DOMAIN,
             update_interval: datetime.timedelta = datetime.timedelta(30),
+            max_update_interval: datetime.timedelta | None = None,
+            store: ZbxSnapshotStore | None = None,
+            unique_base: str | None = None,
+            refresh_timeout: float = MAX_REFRESH_DURATION,
     ) -> None:
         """Initialize the coordinator."""
         super().__init__(hass, logger, name=name, update_interval=update_interval)
         self.zbx = zbx
+        self.unique_base = unique_base or zbx.host
+        self.store = store
+        self.refresh_timeout = refresh_timeout
+        # True while serving a snapshot or the last good data because Zabbix cannot be polled
+        self.stale = False
+        # Time of the served data, None if unknown
+        self.last_live = None
+        # False until a live poll has built the problem table
+        self._live = False
+        self.min_interval = update_interval
+        self.max_interval = max_update_interval or update_interval
+        self._base_interval = update_interval
+        self._poll_lock = asyncio.Lock()
+        # Webhook events received while a poll runs, applied once it finishes
+        self._pending_push = []
+        self._fingerprints = {}
+        # Listener contexts to notify after the next refresh; None notifies all
+        self._changed = None
+        self._notified_success = None
+        # Problem open/resolve transitions, and their counts over the last STATS_WINDOW seconds
+        self.transitions = TransitionBuffer(STATS_BUFFER_SIZE)
+        self.trends = {}
+        self.trends_truncated = False
+        # Problems by tag of the last live poll or push, before the host metadata join
+        self._unjoined = None
+
+    def _diff_fingerprints(self, data):
+        """Record which (type key, sensor name) contexts changed since the last refresh."""
+        fingerprints = {
+            (type_key, name): fingerprint(events)
+            for type_key in (ZBX_SERVICES_KEY, ZBX_PROBLEMS_KEY, ZBX_HOSTGROUPS_KEY)
+            for name, events in data[type_key].items()
+        }
+        old = self._fingerprints
+        self._changed = {
+            ctx for ctx in fingerprints.keys() | old.keys()
+            if fingerprints.get(ctx) != old.get(ctx)
+        }
+        self._fingerprints = fingerprints
+
+    def _record_transitions(self) -> None:
+        """Feed the problems opened and resolved since the last call into the buffer.
+
+        Problems are compared before the host metadata join, so hosts entering
+        or leaving maintenance do not count as problems opening or resolving.
+        """
+        new = self.zbx.unjoined_problems()
+        old, self._unjoined = self._unjoined, new
+        if old is None:
+            # Without a previous table every open problem would count as opened now
+            return
+        now = time.time()
+        for name in old.keys() | new.keys():
+            if old.get(name) is not new.get(name):
+                self.transitions.add_diff(name, old.get(name, ()), new.get(name, ()), now)
+
+    def _adapt_interval(self) -> None:
+        """Back off while nothing changes, tighten right after a change."""
+        if self._changed:
+            self._base_interval = self.min_interval
+        else:
+            self._base_interval = min(self._base_interval * 2, self.max_interval)
+        self.update_interval = self._base_interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only entities whose data changed, or all when availability changed."""
+        # Windows slide with time; recount once per notification for all trend sensors
+        now = time.time()
+        self.trends = self.transitions.window(STATS_WINDOW, now)
+        self.trends_truncated = self.transitions.truncated(STATS_WINDOW, now)
+        with self.zbx.metrics.phase(PHASE_ENTITY_WRITES) as stats:
+            if self._changed is None or self.last_update_success != self._notified_success:
+                stats.items += len(self._listeners)
+                super().async_update_listeners()
+            else:
+                for update_callback, context in list(self._listeners.values()):
+                    if context is None or context in self._changed:
+                        stats.items += 1
+                        update_callback()
+        self._notified_success = self.last_update_success
+        self._changed = set()
+
+    async def async_restore(self) -> bool:
+        """Serve the persisted snapshot as stale data; False if there is none."""
+        if self.store is None:
+            return False
+        snapshot = await self.store.async_load(self.zbx.url)
+        if snapshot is None:
+            return False
+        api_version, data, self.last_live = snapshot
+        self.zbx.api_version = self.zbx.api_version or api_version
+        self.stale = True
+        self._diff_fingerprints(data)
+        self.data = data
+        return True
+
+    @callback
+    def _async_save_snapshot(self, data) -> None:
+        if self.store is not None:
+            self.store.async_schedule_save(self.zbx, data, self.last_live)
+
+    def _serve_stale(self, err):
+        """Return the last good data marked stale, or fail if there is none.
+
+        Only for transport failures (timeouts, connection errors, open
+        circuits); API errors fail the refresh.
+        """
+        if self.data is None:
+            raise UpdateFailed(f"Cannot poll Zabbix at {self.zbx.url}: {err}") from err
+        if not self.stale:
+            self.logger.warning("Cannot poll Zabbix at %s, serving data from %s: %s",
+                                self.zbx.url, self.last_live, err)
+            # Rewrite every sensor once to add the stale attributes
+            self._changed = None
+        else:
+            self._changed = set()
+        self.stale = True
+        self._adapt_interval()
+        return self.data
+
+    @callback
+    def async_push_events(self, events) -> None:
+        """Apply webhook events and notify only the sensors they affect."""
+        if self._poll_lock.locked() or not self._live:
+            # The problem table is only complete after a live poll
+            if len(self._pending_push) + len(events) > PUSH_QUEUE_MAX:
+                self.logger.warning("Dropping %d queued Zabbix push events; the next poll resyncs all problems",
+                                    len(self._pending_push) + len(events))
+                self._pending_push.clear()
+                self.zbx.request_full_sync()
+                return
+            self._pending_push.extend(events)
+            return
+        changed = [self.zbx.apply_pushed_event(event) for event in events]
+        if not any(changed):
+            return
+        data = {
+            **self.data,
+            ZBX_PROBLEMS_KEY: self.zbx.pushed_problems(),
+            ZBX_HOSTGROUPS_KEY: self.zbx.problem_groups(),
+        }
+        self._diff_fingerprints(data)
+        self._record_transitions()
+        self.data = data
+        self._async_save_snapshot(data)
+        self.async_update_listeners()
+
+    async def _async_refresh(self, *args, **kwargs) -> None:
+        """Record one metrics cycle per refresh, entity writes included."""
+        self.zbx.metrics.start_cycle()
+        try:
+            await super()._async_refresh(*args, **kwargs)
+        finally:
+            self.zbx.metrics.end_cycle()
 
     async def _async_update_data(self):
-        return {
-            ZBX_SERVICES_KEY: await self.hass.async_add_executor_job(self.zbx.services),
-            ZBX_PROBLEMS_KEY: await self.hass.async_add_executor_job(self.zbx.problems)
+        if self._poll_lock.locked():
+            # A manual refresh raced the scheduled one; keep serving the running poll's data
+            self._changed = set()
+            return self.data
+        async with self._poll_lock:
+            try:
+                # Hard cap so an unresponsive frontend cannot stall refreshes; requests have their own timeout
+                async with asyncio.timeout(self.refresh_timeout):
+                    if self.zbx.zapi is None:
+                        await self.zbx.async_connect(async_get_clientsession(self.hass, verify_ssl=False))
+                    with self.zbx.metrics.phase(PHASE_REFRESH):
+                        services, problems = await _gather_or_cancel(
+                            self.zbx.async_services(),
+                            self.zbx.async_problems()
+                        )
+            except ZbxAuthError as err:
+                raise ConfigEntryAuthFailed(f"Zabbix at {self.zbx.url} rejected the API token: {err}") from err
+            except APIRequestError as err:
+                # Not an outage: stale data would hide it until the next restart
+                raise UpdateFailed(f"Zabbix API error at {self.zbx.url}: {err}") from err
+            except (ProcessingError, aiohttp.ClientError, TimeoutError) as err:
+                return self._serve_stale(err)
+            pending, self._pending_push = self._pending_push, []
+            if pending:
+                for event in pending:
+                    self.zbx.apply_pushed_event(event)
+                problems = self.zbx.pushed_problems()
+        data = {
+            ZBX_SERVICES_KEY: services,
+            ZBX_PROBLEMS_KEY: problems,
+            ZBX_HOSTGROUPS_KEY: self.zbx.problem_groups()
         }
+        was_stale = self.stale
+        self.stale = False
+        self._live = True
+        self.last_live = dt_util.utcnow()
+        self._diff_fingerprints(data)
+        self._record_transitions()
+        self._adapt_interval()
+        if self._changed or was_stale:
+            self._async_save_snapshot(data)
+        if was_stale:
+            # Live data replaces stale data: rewrite every sensor to drop the stale attributes
+            self._changed = None
+        return data
@@ -0,0 +1,75 @@
+"""Persisted coordinator data for fast startup.
+
+The last good service and problem data of a config entry is kept in HA's
+storage so sensors can be created from it before Zabbix answers.
+"""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    ZBX_HOSTGROUPS_KEY,
+    ZBX_PROBLEMS_KEY,
+    ZBX_SERVICES_KEY,
+)
+from .zabbix import ZbxEvent
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_KEYS = (ZBX_SERVICES_KEY, ZBX_PROBLEMS_KEY, ZBX_HOSTGROUPS_KEY)
+
+
+class ZbxSnapshotStore:
+    """Last good coordinator data and API version of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        self._store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+    async def async_load(self, url):
+        """Return (api_version, data, time of the data) saved for the API at url, or None."""
+        stored = await self._store.async_load()
+        if not stored or stored.get("url") != url:
+            return None
+        try:
+            data = {
+                type_key: {
+                    name: [ZbxEvent.from_dict(event) for event in events]
+                    # Snapshots from before host groups lack that key
+                    for name, events in stored["data"].get(type_key, {}).items()
+                }
+                for type_key in DATA_KEYS
+            }
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring malformed Zabbix snapshot of %s", url)
+            return None
+        updated = stored.get("updated")
+        return stored.get("api_version"), data, updated and dt_util.parse_datetime(updated)
+
+    @callback
+    def async_schedule_save(self, zbx, data, updated) -> None:
+        """Save data polled at updated after SNAPSHOT_SAVE_DELAY, coalescing saves in between."""
+        self._store.async_delay_save(lambda: _serialize(zbx, data, updated), SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the snapshot."""
+        await self._store.async_remove()
+
+
+def _serialize(zbx, data, updated):
+    return {
+        "url": zbx.url,
+        "api_version": zbx.api_version,
+        "updated": updated.isoformat() if updated else None,
+        "data": {
+            type_key: {name: [event.as_dict() for event in events] for name, events in data[type_key].items()}
+            for type_key in DATA_KEYS
+        },
+    }
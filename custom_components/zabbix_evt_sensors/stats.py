@@ -0,0 +1,104 @@
+"""Problem open and resolve transitions for trend sensors.
+
+TransitionBuffer keeps the most recent transitions of all problem sensors
+in a fixed-size ring of typed arrays, so memory stays constant however
+long HA runs. Windowed counts and mean time to resolve are computed by
+scanning back from the newest entry until the window start; if more
+transitions happened within the window than the buffer holds, they are
+truncated (see truncated).
+"""
+from array import array
+import math
+import time
+
+OPENED = 0
+RESOLVED = 1
+
+
+class TransitionBuffer:
+    """Fixed-size ring buffer of problem transitions; the oldest entries are overwritten first.
+
+    Entries are stored column-wise: record time, kind, sensor key index and,
+    for resolutions, seconds from problem start to resolution (NaN if the
+    start is unknown).
+    """
+
+    def __init__(self, size=4096) -> None:
+        """Initialize the buffer with room for size transitions."""
+        self.size = size
+        self._times = array("d", [0.0]) * size
+        self._kinds = array("b", [0]) * size
+        self._keys = array("I", [0]) * size
+        self._durations = array("d", [0.0]) * size
+        self._next = 0
+        self._count = 0
+        self._key_index = {}
+        self._key_names = []
+
+    def __len__(self):
+        """Return the number of stored transitions."""
+        return self._count
+
+    def _index(self, key):
+        index = self._key_index.get(key)
+        if index is None:
+            index = self._key_index[key] = len(self._key_names)
+            self._key_names.append(key)
+        return index
+
+    def add(self, key, kind, duration=math.nan, now=None):
+        """Store one transition of a sensor key."""
+        i = self._next
+        self._times[i] = time.time() if now is None else now
+        self._kinds[i] = kind
+        self._keys[i] = self._index(key)
+        self._durations[i] = duration
+        self._next = (i + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def add_diff(self, key, old_events, new_events, now=None):
+        """Store the transitions between two event lists of a sensor key."""
+        now = time.time() if now is None else now
+        old = {e.eid: e for e in old_events}
+        new = {e.eid for e in new_events}
+        for e in new_events:
+            if e.eid not in old:
+                self.add(key, OPENED, now=now)
+        for eid, e in old.items():
+            if eid not in new:
+                self.add(key, RESOLVED, now - e.clock if e.clock else math.nan, now)
+
+    def truncated(self, seconds, now=None):
+        """Return True if transitions of the last seconds were overwritten, so window() undercounts."""
+        now = time.time() if now is None else now
+        # Once full, the oldest entry is the next one to be overwritten
+        return self._count == self.size and self._times[self._next] > now - seconds
+
+    def window(self, seconds, now=None):
+        """Return {key: (opened, resolved, mean seconds to resolve or None)} of the last seconds."""
+        now = time.time() if now is None else now
+        start = now - seconds
+        opened = {}
+        resolved = {}
+        durations = {}
+        i = self._next
+        for _ in range(self._count):
+            i = (i - 1) % self.size
+            if self._times[i] < start:
+                break
+            key = self._keys[i]
+            if self._kinds[i] == OPENED:
+                opened[key] = opened.get(key, 0) + 1
+            else:
+                resolved[key] = resolved.get(key, 0) + 1
+                duration = self._durations[i]
+                if not math.isnan(duration):
+                    total, count = durations.get(key, (0.0, 0))
+                    durations[key] = (total + duration, count + 1)
+        result = {}
+        for key in opened.keys() | resolved.keys():
+            total, count = durations.get(key, (0.0, 0))
+            result[self._key_names[key]] = (
+                opened.get(key, 0), resolved.get(key, 0), total / count if count else None
+            )
+        return result
@@ -0,0 +1,132 @@
+"""Matching of problem tags against configured "tag:value" keys.
+
+A key is either an exact "tag:value" pair or a pattern with shell style
+wildcards (*, ?, [...]) in the value and/or the tag, e.g. "service:*" or
+"env:prod-*". TagMatcher compiles all keys once: exact tags are looked up
+in a dict, values of a tag in a dict (exact), a character trie (trailing
+"*" prefixes) and compiled regexes (other globs). Results are memoized per
+tag/value pair, which repeat across problems, so indexing a problem costs
+about the same as exact matching.
+"""
+from fnmatch import translate
+import re
+
+GLOB_CHARS = frozenset("*?[")
+
+# Memoized tag/value pairs before the cache is reset
+MATCH_CACHE_MAX = 50000
+
+# Trie node key holding the configured keys of the prefix ending there
+_KEYS = ""
+
+
+def is_pattern(text):
+    """Return True if text contains shell style wildcards."""
+    return not GLOB_CHARS.isdisjoint(text)
+
+
+def _literal_prefix(pattern):
+    """Return the text before a pattern's first wildcard."""
+    return re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+
+
+class _ValueMatcher:
+    """Configured value patterns of one tag name."""
+
+    __slots__ = ("exact", "prefixes", "globs")
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.exact = {}
+        self.prefixes = {}
+        self.globs = []
+
+    def add(self, value, key):
+        if not is_pattern(value):
+            self.exact.setdefault(value, []).append(key)
+        elif value.endswith("*") and not is_pattern(value[:-1]):
+            node = self.prefixes
+            for char in value[:-1]:
+                node = node.setdefault(char, {})
+            node.setdefault(_KEYS, []).append(key)
+        else:
+            self.globs.append((re.compile(translate(value)).match, key))
+
+    def match(self, value, found):
+        """Append the keys matching value to found."""
+        found.extend(self.exact.get(value, ()))
+        node = self.prefixes
+        if node:
+            found.extend(node.get(_KEYS, ()))
+            for char in value:
+                node = node.get(char)
+                if node is None:
+                    break
+                found.extend(node.get(_KEYS, ()))
+        for match, key in self.globs:
+            if match(value):
+                found.append(key)
+
+
+class TagMatcher:
+    """Compiled set of configured "tag:value" keys and patterns."""
+
+    def __init__(self, keys) -> None:
+        """Compile keys; a key without ":" matches the tag with an empty value."""
+        self.keys = frozenset(keys)
+        self._by_tag = {}
+        self._tag_globs = []
+        for key in sorted(self.keys):
+            tag, _, value = key.partition(":")
+            if is_pattern(tag):
+                values = _ValueMatcher()
+                self._tag_globs.append((re.compile(translate(tag)).match, values))
+            else:
+                values = self._by_tag.setdefault(tag, _ValueMatcher())
+            values.add(value, key)
+        self._cache = {}
+
+    def _match_pair(self, tag, value):
+        found = []
+        values = self._by_tag.get(tag)
+        if values is not None:
+            values.match(value, found)
+        for match, values in self._tag_globs:
+            if match(tag):
+                values.match(value, found)
+        return tuple(found)
+
+    def match(self, tags):
+        """Return the configured keys matched by a problem's list of tag dicts."""
+        keys = []
+        cache = self._cache
+        for tag in tags:
+            pair = (tag["tag"], tag["value"])
+            found = cache.get(pair)
+            if found is None:
+                if len(cache) >= MATCH_CACHE_MAX:
+                    cache.clear()
+                found = cache[pair] = self._match_pair(*pair)
+            keys.extend(found)
+        # Several tags of one problem can match the same pattern
+        return list(dict.fromkeys(keys)) if len(keys) > 1 else keys
+
+    def tag_filter(self):
+        """Build a problem.get tags filter (evaltype 2) selecting at least the matching problems.
+
+        Patterns become "exists" (operator 4) or "contains literal prefix"
+        (operator 0) conditions and are narrowed by match(). Returns None if
+        a tag name pattern makes server side filtering impossible.
+        """
+        if self._tag_globs:
+            return None
+        tag_filter = []
+        for key in sorted(self.keys):
+            tag, _, value = key.partition(":")
+            if not is_pattern(value):
+                tag_filter.append({"tag": tag, "value": value, "operator": 1})
+            elif prefix := _literal_prefix(value):
+                tag_filter.append({"tag": tag, "value": prefix, "operator": 0})
+            else:
+                tag_filter.append({"tag": tag, "operator": 4})
+        return tag_filter
@@ -3,27 +3,91 @@
 This module provides classes and utilities to interact with Zabbix,
 including event handling and API integration.
 """
-from collections import defaultdict
+import asyncio
+from collections import Counter, OrderedDict, defaultdict
+from functools import partial
+import json
 import logging
+from operator import itemgetter
+from sys import intern
+import time
 
-import ssl
-from zabbix_utils import ZabbixAPI
+import aiohttp
+from zabbix_utils import AsyncZabbixAPI
+from zabbix_utils.exceptions import APIRequestError, ProcessingError
+
+from .metrics import (
+    PHASE_EVENT_HOSTS,
+    PHASE_EVENT_POLL,
+    PHASE_HOST_GET,
+    PHASE_INDEX,
+    PHASE_PROBLEM_GET,
+    PHASE_SERVICE_GET,
+    PHASE_SERVICE_STATUS,
+    MeteredSession,
+    PollMetrics,
+)
+from .tagmatch import TagMatcher
 
 
 _LOGGER = logging.getLogger(__name__)
 
+# Consecutive transport failures that suspend calls to an endpoint, and for how many seconds
+CIRCUIT_FAILURES = 3
+CIRCUIT_COOLDOWN = 60
+
+# Weight of the newest sample in endpoint latency and health averages
+ENDPOINT_EMA = 0.2
+ENDPOINT_MIN_HEALTH = 0.05
+
+# Canonical tag tuples by (tag, value) pairs and tag dicts by pair, shared by all events; reset when too large
+_SHARED_TAG_SETS = {}
+_SHARED_TAGS = {}
+_SHARED_TAGS_MAX = 50000
+_tag_pair = itemgetter("tag", "value")
+
+
+def _intern_tags(tags):
+    """Return a shared tuple of interned copies of API tag dicts; callers must not mutate the dicts.
+
+    Events mostly repeat a few tag sets, so a set costs one lookup keyed by
+    its pairs, which map() builds without a Python level loop per tag.
+    """
+    key = tuple(map(_tag_pair, tags))
+    shared = _SHARED_TAG_SETS.get(key)
+    if shared is None:
+        if len(_SHARED_TAG_SETS) >= _SHARED_TAGS_MAX or len(_SHARED_TAGS) >= _SHARED_TAGS_MAX:
+            _SHARED_TAG_SETS.clear()
+            _SHARED_TAGS.clear()
+        shared = _SHARED_TAG_SETS[key] = tuple(
+            _SHARED_TAGS.get(pair) or _SHARED_TAGS.setdefault(pair, {"tag": intern(pair[0]), "value": intern(pair[1])})
+            for pair in key
+        )
+    return shared
+
 
 class ZbxEvent:
-    """ZbcEvent Class."""
+    """ZbxEvent Class.
 
-    def __init__(self, eid, name, severity, tags, host=None, info=None) -> None:
-        """Initialize the class."""
+    Slotted record of one problem or root service. Severity and clock are
+    kept as integers; host names and tag tuples are interned since they repeat
+    across many events. Events are immutable, so the attribute form is built
+    once and reused by every later state write.
+    """
+
+    __slots__ = ("eid", "name", "severity", "tags", "host", "info", "clock", "hostid", "_dict")
+
+    def __init__(self, eid, name, severity, tags, host=None, info=None, clock=None, hostid=None) -> None:
+        """Initialize the class from API values; tags is a list of tag dicts."""
         self.eid = eid
         self.name = name
-        self.severity = severity
-        self.tags = tags
-        self.host = host or 'ZabbixService'
-        self.info = info or []
+        self.severity = int(severity)
+        self.tags = _intern_tags(tags)
+        self.host = intern(host) if host else 'ZabbixService'
+        self.info = info or ()
+        self.clock = int(clock) if clock is not None else None
+        self.hostid = hostid
+        self._dict = None
 
     def __eq__(self, other):
         """Check for equality."""
@@ -34,6 +98,32 @@ class ZbxEvent:
             and (self.severity == other.severity)
         )
 
+    def unchanged(self, name, severity, host, hostid=None):
+        """Return True if a refetched problem still has this event's name, severity and host."""
+        return (self.name == name and self.severity == int(severity) and self.host == host
+                and self.hostid == hostid)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an event from its as_dict form."""
+        return cls(data["eid"], data["name"], data["severity"], data["tags"], host=data["host"],
+                   info=data["info"], clock=data.get("clock"), hostid=data.get("hostid"))
+
+    def as_dict(self):
+        """Serialize to the sensor attribute form; the shared result must not be mutated."""
+        if self._dict is None:
+            self._dict = {
+                "eid": self.eid,
+                "name": self.name,
+                "severity": self.severity,
+                "tags": self.tags,
+                "host": self.host,
+                "info": self.info,
+                "clock": self.clock,
+                "hostid": self.hostid,
+            }
+        return self._dict
+
     def __str__(self):
         """Represent string."""
         return f"{self.host}: {self.name} ({self.severity}, {self.info})"
@@ -43,74 +133,850 @@ class ZbxEvent:
         return f"<ZbxEvent: {self.eid}, {self.host}, {self.name}, {self.severity}, {self.info}>"
 
 
-class Zbx:
-    """Zbx Class."""
+def fingerprint(events):
+    """Hash the state-relevant parts of a sensor's events, independent of order."""
+    return hash(frozenset(
+        (e.eid, e.severity, tuple(child.get("status") for child in e.info))
+        for e in events
+    ))
 
-    def __init__(self, host, api_token, path="", port=443, use_ssl=True) -> None:
+
+class EventHostCache:
+    """Bounded LRU map of problem event ID to (host ID, host name)."""
+
+    def __init__(self, maxsize=20000) -> None:
         """Initialize the class."""
-        self.host = host
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._hosts = OrderedDict()
+
+    def __len__(self):
+        """Return number of cached event IDs."""
+        return len(self._hosts)
+
+    def lookup(self, eids):
+        """Return (cached eventid -> host map, list of uncached event IDs)."""
+        found = {}
+        missing = []
+        for eid in eids:
+            host = self._hosts.get(eid)
+            if host is None:
+                missing.append(eid)
+            else:
+                self._hosts.move_to_end(eid)
+                found[eid] = host
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def update(self, eidmap):
+        """Add event hosts, evicting least recently used entries above maxsize."""
+        for eid, host in eidmap.items():
+            self._hosts[eid] = host
+            self._hosts.move_to_end(eid)
+        while len(self._hosts) > self.maxsize:
+            self._hosts.popitem(last=False)
+
+    def discard(self, eid):
+        """Forget a closed problem."""
+        self._hosts.pop(eid, None)
+
+    def retain(self, eids):
+        """Forget every event ID not in eids."""
+        for eid in [eid for eid in self._hosts if eid not in eids]:
+            del self._hosts[eid]
+
+
+class ZbxHost:
+    """Slotted host metadata record; names and groups are interned."""
+
+    __slots__ = ("hostid", "name", "groups", "maintenance")
+
+    def __init__(self, hostid, name, groups, maintenance) -> None:
+        """Initialize the class from API values; groups is a list of group names."""
+        self.hostid = hostid
+        self.name = intern(name)
+        self.groups = tuple(intern(group) for group in groups)
+        self.maintenance = maintenance
+
+
+class HostMetadataCache:
+    """Host groups and maintenance status by host ID, refreshed every interval seconds."""
+
+    def __init__(self, interval=300) -> None:
+        """Initialize the class."""
+        self.interval = interval
+        self.updates = 0
+        self.groups = frozenset()
+        self.in_maintenance = frozenset()
+        self._hosts = {}
+        self._last_update = None
+
+    def __len__(self):
+        """Return number of cached hosts."""
+        return len(self._hosts)
+
+    def needs_update(self):
+        """Return True if the cache is empty or older than interval."""
+        return self._last_update is None or time.monotonic() - self._last_update >= self.interval
+
+    def update(self, raw_hosts):
+        """Replace the cache with host.get output."""
+        hosts = {}
+        for h in raw_hosts:
+            # host.get returns "hostgroups" since Zabbix 6.2, "groups" before
+            groups = [group["name"] for group in h.get("hostgroups", h.get("groups", ()))]
+            hosts[h["hostid"]] = ZbxHost(h["hostid"], h["name"], groups, h.get("maintenance_status") == "1")
+        self._hosts = hosts
+        self.groups = frozenset(group for host in hosts.values() for group in host.groups)
+        self.in_maintenance = frozenset(host.hostid for host in hosts.values() if host.maintenance)
+        self._last_update = time.monotonic()
+        self.updates += 1
+
+    def get(self, hostid):
+        """Return the host with hostid, None if unknown."""
+        return self._hosts.get(hostid)
+
+
+def api_url(host, path="", port=443, use_ssl=True):
+    """Return the API URL of a Zabbix frontend."""
+    protocol = "https" if use_ssl else "http"
+    return f"{protocol}://{host}:{port}/{path}"
+
+
+def api_urls(host, path="", port=443, use_ssl=True, frontends=""):
+    """Return the API URLs of host and of the comma separated "host[:port]" frontends.
+
+    Additional frontends share path and TLS setting and default to port.
+    Raises ValueError on a malformed port.
+    """
+    urls = [api_url(host, path, port, use_ssl)]
+    for frontend in frontends.split(","):
+        frontend_host, _, frontend_port = frontend.strip().partition(":")
+        if frontend_host:
+            urls.append(api_url(frontend_host, path, int(frontend_port or port), use_ssl))
+    return urls
+
+
+class CircuitOpenError(ProcessingError):
+    """Calls to a server are suspended after repeated failures."""
+
+
+class ZbxAuthError(APIRequestError):
+    """The server rejected the API token."""
+
+
+# Zabbix API error details of a rejected token or an expired session
+AUTH_ERROR_DATA = ("not authorised", "not authorized", "re-login")
+
+
+def is_auth_error(err):
+    """Return True if an API error reports a rejected token or session."""
+    return any(data in str(getattr(err, "data", err)).lower() for data in AUTH_ERROR_DATA)
+
+
+class ZbxEndpoint:
+    """One frontend of a ZbxClient, with its health and round-trip latency.
+
+    latency is a moving average of successful request times in seconds,
+    health a moving average of request outcomes (1 success, 0 failure).
+    After failure_threshold consecutive failures the endpoint's circuit
+    opens and it is skipped for cooldown seconds.
+    """
+
+    def __init__(self, url) -> None:
+        """Initialize the class."""
+        self.url = url
+        self.zapi = None
+        self.latency = None
+        self.health = 1.0
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0
+        self.circuit_trips = 0
+        self._open_until = 0.0
+
+    @property
+    def circuit_open(self):
+        """Return True while the endpoint is skipped."""
+        return self.failures >= CIRCUIT_FAILURES and time.monotonic() < self._open_until
+
+    def cost(self):
+        """Return the selection cost: expected latency weighted by failure rate; lower is better."""
+        # Unmeasured endpoints rank behind measured ones of up to one second
+        latency = 1.0 if self.latency is None else self.latency
+        return latency / max(self.health, ENDPOINT_MIN_HEALTH)
+
+    def record_success(self, elapsed):
+        self.requests += 1
+        self.failures = 0
+        self.health += ENDPOINT_EMA * (1.0 - self.health)
+        self.latency = elapsed if self.latency is None else self.latency + ENDPOINT_EMA * (elapsed - self.latency)
+
+    def record_failure(self, cooldown):
+        self.requests += 1
+        self.errors += 1
+        self.failures += 1
+        self.health -= ENDPOINT_EMA * self.health
+        if self.failures >= CIRCUIT_FAILURES:
+            # Also re-opens after a failed attempt once the cooldown expired
+            self._open_until = time.monotonic() + cooldown
+            self.circuit_trips += 1
+            _LOGGER.warning("Suspending calls to %s for %ss after %d failures", self.url, cooldown, self.failures)
+
+    def as_dict(self):
+        """Serialize for diagnostics."""
+        return {
+            "url": self.url,
+            "connected": self.zapi is not None,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 3),
+            "health": round(self.health, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "failures": self.failures,
+            "circuit_open": self.circuit_open,
+            "circuit_trips": self.circuit_trips,
+        }
+
+
+class ZbxClient:
+    """Authenticated Zabbix API sessions shared by every AsyncZbx of one server.
+
+    urls lists frontends of the same Zabbix server; each request goes to
+    the available endpoint with the lowest cost and fails over to the next
+    one on a timeout or connection error. Calls fail with CircuitOpenError
+    only while every endpoint's circuit is open. API errors are not failed
+    over; a rejected token or session raises ZbxAuthError.
+    Identical calls are coalesced: while a call is running, callers with
+    the same method and parameters get the same result object, which none
+    of them may mutate. Finished results are not reused, so every poll
+    sees current data.
+    Each request is limited to timeout seconds.
+    """
+
+    def __init__(self, urls, api_token, timeout=30, cooldown=CIRCUIT_COOLDOWN) -> None:
+        """Initialize the class; call async_connect before use."""
+        self.endpoints = [ZbxEndpoint(url) for url in urls]
         self.api_token = api_token
-        self.path = path
-        self.port = port
-        protocol = "https" if use_ssl else "http"
-        self.url = f"{protocol}://{self.host}:{self.port}/{self.path}"
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.api_version = None
+        self.requests = 0
+        self.coalesced = 0
+        self._session = None
+        self._own_session = None
+        self._connect_lock = asyncio.Lock()
+        self._calls = {}
+
+    @property
+    def zapi(self):
+        """Return the API of the preferred connected endpoint, None before async_connect."""
+        connected = [endpoint for endpoint in self._ranked() if endpoint.zapi is not None]
+        return connected[0].zapi if connected else None
+
+    @property
+    def circuit_open(self):
+        """Return True while calls are suspended on every endpoint."""
+        return all(endpoint.circuit_open for endpoint in self.endpoints)
+
+    async def async_connect(self, client_session=None):
+        """Log in to every endpoint and verify the token; succeeds if one endpoint does."""
+        async with self._connect_lock:
+            if self._session is not None:
+                return
+            if client_session is None:
+                client_session = self._own_session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(ssl=False)
+                )
+            self._check_circuit()
+            # Response bytes are counted for the poll phase of whichever entry's task sent the request
+            session = MeteredSession(client_session)
+            results = await asyncio.gather(
+                *(self._connect_endpoint(endpoint, session) for endpoint in self.endpoints),
+                return_exceptions=True
+            )
+            errors = [result for result in results if isinstance(result, BaseException)]
+            if len(errors) == len(results):
+                raise errors[0]
+            for endpoint, result in zip(self.endpoints, results):
+                if isinstance(result, BaseException):
+                    _LOGGER.warning("Zabbix frontend %s unavailable: %s", endpoint.url, result)
+            self._session = session
+
+    async def _connect_endpoint(self, endpoint, session):
+        """Log in to one endpoint; the token check doubles as its first latency sample."""
+        try:
+            # AsyncZabbixAPI checks the API version with a blocking request on creation
+            zapi = await asyncio.get_running_loop().run_in_executor(
+                None,
+                partial(AsyncZabbixAPI, endpoint.url, validate_certs=False, client_session=session,
+                        timeout=self.timeout)
+            )
+            await zapi.login(token=self.api_token)
+            start = time.perf_counter()
+            # Token logins are not checked by the server until used; user.checkAuthentication is the cheapest call
+            async with asyncio.timeout(self.timeout):
+                authenticated = await zapi.check_auth()
+        except (TimeoutError, aiohttp.ClientError, ProcessingError):
+            endpoint.record_failure(self.cooldown)
+            raise
+        if not authenticated:
+            raise ZbxAuthError("API token not accepted")
+        endpoint.record_success(time.perf_counter() - start)
+        # Only a logged in endpoint counts as connected
+        endpoint.zapi = zapi
+        self.api_version = self.api_version or str(zapi.api_version())
+
+    async def async_call(self, method, query):
+        """Call an API method, sharing the request with identical concurrent calls."""
+        key = (method, json.dumps(query, sort_keys=True))
+        task = self._calls.get(key)
+        if task is None:
+            self._check_circuit()
+            self.requests += 1
+            task = self._calls[key] = asyncio.ensure_future(self._send(method, query))
+            task.add_done_callback(partial(self._call_done, key))
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not cancel the request for the others
+        return (await asyncio.shield(task)).get("result")
 
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+    def _ranked(self):
+        """Return endpoints with a closed circuit, cheapest first."""
+        return sorted((endpoint for endpoint in self.endpoints if not endpoint.circuit_open),
+                      key=ZbxEndpoint.cost)
 
-        self.zapi = ZabbixAPI(self.url, ssl_context=ctx)
-        self.zapi.login(token=self.api_token)
+    def _check_circuit(self):
+        if self.circuit_open:
+            raise CircuitOpenError(
+                f"Calls to {', '.join(endpoint.url for endpoint in self.endpoints)} suspended "
+                f"after repeated failures"
+            )
 
-        self.api_version = str(self.zapi.api_version())
+    async def _send(self, method, query):
+        """Send one request to the best endpoint within the timeout, failing over to the others."""
+        error = None
+        for endpoint in self._ranked():
+            try:
+                if endpoint.zapi is None:
+                    # Endpoint was down at connect time
+                    await self._connect_endpoint(endpoint, self._session)
+                start = time.perf_counter()
+                async with asyncio.timeout(self.timeout):
+                    response = await endpoint.zapi.send_async_request(method, query)
+            except (TimeoutError, aiohttp.ClientError, ProcessingError) as err:
+                if endpoint.zapi is not None:
+                    endpoint.record_failure(self.cooldown)
+                error = err
+                continue
+            except APIRequestError as err:
+                if is_auth_error(err):
+                    raise ZbxAuthError(str(err)) from err
+                raise
+            endpoint.record_success(time.perf_counter() - start)
+            return response
+        if error is None:
+            self._check_circuit()
+        raise error
+
+    def _call_done(self, key, task):
+        self._calls.pop(key, None)
+
+    async def async_close(self):
+        """Close the aiohttp session if we created it."""
+        for endpoint in self.endpoints:
+            endpoint.zapi = None
+        self._session = None
+        if self._own_session is not None:
+            await self._own_session.close()
+            self._own_session = None
+
+
+class AsyncZbx:
+    """Zabbix problems and services, polled on the event loop via the zabbix_utils asyncio API."""
+
+    def __init__(self, host, api_token, path="", port=443, use_ssl=True, tag_values=None,
+                 full_sync_interval=0, host_cache_size=20000, topology_interval=0, page_size=0,
+                 host_metadata_interval=300, exclude_maintenance=False, host_groups=(), client=None) -> None:
+        """Initialize the class; call async_connect before use.
+
+        tag_values restricts problem fetching and indexing to the given
+        "tag:value" keys, which may hold wildcards (see tagmatch); None
+        fetches and indexes every problem.
+        full_sync_interval > 0 enables incremental problem polling: between
+        full snapshots taken every full_sync_interval seconds only new events
+        are fetched and applied to the problem table.
+        host_cache_size caps the event ID -> host cache kept across polls.
+        topology_interval > 0 caches the service tree and tags for that many
+        seconds (or until the service count changes) and only polls statuses
+        in between.
+        page_size > 0 fetches full problem snapshots in event ID ordered pages
+        of that size, indexing each page before requesting the next.
+        exclude_maintenance drops problems of hosts in maintenance and
+        problems are grouped by the host group names in host_groups (see
+        problem_groups). Both
+        join problems in memory against host metadata fetched every
+        host_metadata_interval seconds.
+        client is a ZbxClient shared with other entries of the same server;
+        without one a private client is created.
+        """
+        self.host = host
+        self.api_token = api_token
+        self.path = path
+        self.port = port
+        self.url = api_url(host, path, port, use_ssl)
+        self.zapi = None
+        self.api_version = None
+        self.tag_values = None if tag_values is None else frozenset(tag_values)
+        self._matcher = None if tag_values is None else TagMatcher(self.tag_values)
+        self.full_sync_interval = full_sync_interval
+        self.page_size = page_size
+        self._last_eventid = None
+        self._last_full_sync = 0.0
+        self._full_sync_requested = False
+        self.host_cache = EventHostCache(host_cache_size)
+        # eventid -> (ZbxEvent, tag keys, trigger id)
+        self._problem_table = {}
+        self._eids_by_trigger = defaultdict(set)
+        self._tag_members = defaultdict(dict)
         self._problems_by_tag = defaultdict(list)
+        # Table replaced by a running full snapshot, restored if the snapshot fails
+        self._previous_table = None
         self._services_by_tag = defaultdict(list)
+        self.exclude_maintenance = exclude_maintenance
+        self.host_groups = frozenset(host_groups)
+        self.host_metadata = (
+            HostMetadataCache(host_metadata_interval) if exclude_maintenance or host_groups else None
+        )
+        self._problems_by_group = {}
+        self.topology_interval = topology_interval
+        self._svc_roots = None
+        self._svc_count = 0
+        self._last_topology = 0.0
+        self.metrics = PollMetrics()
+        self.client = client or ZbxClient([self.url], self.api_token)
 
     def _get_taglist(self, tags):
         return [f'{tag["tag"]}:{tag["value"]}' for tag in tags]
 
-    def _get_eidmap(self, eids):
-        """Map event IDs to host names."""
-        events = self.zapi.event.get(
-            eventids=eids,
-            output=["eventid"],
-            selectHosts=["name"]
+    def _problem_keys(self, tags):
+        """Return the configured tag keys of a problem."""
+        if self._matcher is None:
+            return self._get_taglist(tags)
+        return self._matcher.match(tags)
+
+    def _tag_filter(self):
+        """Build a problem.get tags filter from the configured tag keys and patterns, None if there is none."""
+        return self._matcher.tag_filter()
+
+    def _eidmap_query(self, eids):
+        """Build event.get parameters for the host lookup."""
+        return {
+            "eventids": eids,
+            "output": ["eventid"],
+            "selectHosts": ["hostid", "name"]
+        }
+
+    def _api_version_at_least(self, major, minor):
+        try:
+            return tuple(int(part) for part in self.api_version.split(".")[:2]) >= (major, minor)
+        except (AttributeError, ValueError):
+            return False
+
+    def _host_query(self):
+        """Build host.get parameters for the host metadata cache."""
+        groups = "selectHostGroups" if self._api_version_at_least(6, 2) else "selectGroups"
+        return {
+            "output": ["hostid", "name", "maintenance_status"],
+            groups: ["name"],
+            "monitored_hosts": True
+        }
+
+    def _host_group_query(self):
+        """Build hostgroup.get parameters for the groups offered in the config flow."""
+        return {
+            "output": ["name"],
+            "monitored_hosts": True
+        }
+
+    def _needs_host_metadata(self):
+        return self.host_metadata is not None and self.host_metadata.needs_update()
+
+    def _problems_enabled(self):
+        return self.tag_values is None or bool(self.tag_values)
+
+    def _problem_query(self):
+        """Build problem.get parameters."""
+        query = {
+            "output": ["eventid", "severity", "name", "objectid", "clock"],
+            "selectTags": ["tag", "value"]
+        }
+        tag_filter = None if self._matcher is None else self._tag_filter()
+        if tag_filter is not None:
+            # evaltype 2: problem matches any of the tag conditions
+            query["evaltype"] = 2
+            query["tags"] = tag_filter
+        return query
+
+    def _problem_page_query(self, eventid_from):
+        """Build problem.get parameters for the page starting at eventid_from."""
+        query = self._problem_query()
+        query.update(sortfield="eventid", sortorder="ASC", limit=self.page_size)
+        if eventid_from:
+            query["eventid_from"] = str(eventid_from)
+        return query
+
+    def _tag_index_query(self, eventid_from=None):
+        """Build problem.get parameters returning only the tags of current and recently resolved problems."""
+        query = {
+            "output": ["eventid"],
+            "selectTags": ["tag", "value"],
+            "recent": True,
+            "sortfield": "eventid",
+            "sortorder": "ASC"
+        }
+        if self.page_size:
+            query["limit"] = self.page_size
+        if eventid_from:
+            query["eventid_from"] = str(eventid_from)
+        return query
+
+    @staticmethod
+    def _count_tags(problems, counts):
+        """Add the "tag:value" keys of problems to a Counter."""
+        for p in problems:
+            counts.update(f"{tag['tag']}:{tag['value']}" for tag in p.get("tags", ()))
+
+    def _next_page_start(self, page):
+        """Return the event ID the next page starts at, None after the last page."""
+        if not self.page_size or len(page) < self.page_size:
+            return None
+        return int(page[-1]["eventid"]) + 1
+
+    def _last_eventid_query(self):
+        """Build event.get parameters for the newest trigger event."""
+        return {
+            "output": ["eventid"],
+            "source": 0,
+            "object": 0,
+            "sortfield": "eventid",
+            "sortorder": "DESC",
+            "limit": 1
+        }
+
+    def _event_query(self):
+        """Build event.get parameters for trigger events since the last poll."""
+        return {
+            "output": ["eventid", "value", "severity", "name", "objectid", "clock"],
+            "source": 0,
+            "object": 0,
+            "eventid_from": str(self._last_eventid + 1),
+            "selectTags": ["tag", "value"],
+            "selectHosts": ["hostid", "name"],
+            "sortfield": "eventid",
+            "sortorder": "ASC"
+        }
+
+    def _svc_query(self):
+        """Build service.get parameters."""
+        return {
+            "output": ["serviceid", "status", "description"],
+            "selectParents": "count",
+            "selectChildren": ["serviceid", "name", "status"],
+            "selectTags": "extend"
+        }
+
+    def _svc_status_query(self):
+        """Build service.get parameters for statuses only."""
+        return {
+            "output": ["serviceid", "status"]
+        }
+
+    def _event_host(self, event):
+        """Return (host ID, host name) of an event."""
+        if not event.get("hosts"):
+            return None, "N/A"
+        host = event["hosts"][0]
+        return host["hostid"], host["name"]
+
+    def _build_eidmap(self, events):
+        return {e["eventid"]: self._event_host(e) for e in events}
+
+    def _match_problems(self, raw_problems):
+        """Pair problems with their configured tag keys, dropping unmatched ones."""
+        matched = []
+        with self.metrics.phase(PHASE_INDEX) as stats:
+            for p in raw_problems:
+                keys = self._problem_keys(p.get("tags", []))
+                if keys:
+                    matched.append((p, keys))
+            stats.items += len(matched)
+        return matched
+
+    def request_full_sync(self):
+        """Make the next problem update a full snapshot, e.g. after pushed events were dropped."""
+        self._full_sync_requested = True
+
+    def _needs_full_sync(self):
+        return (
+            self.full_sync_interval <= 0
+            or self._full_sync_requested
+            or self._last_eventid is None
+            or time.monotonic() - self._last_full_sync >= self.full_sync_interval
         )
-        return {e["eventid"]: (e["hosts"][0]["name"] if e.get("hosts") else "N/A") for e in events}
 
-    def _update_problems(self):
-        """Get current problems grouped by tag."""
-        self._problems_by_tag.clear()
-        raw_problems = self.zapi.problem.get(
-            output=["eventid", "severity", "name"],
-            selectTags=["tag", "value"]
+    def _mark_full_sync(self, latest):
+        """Remember where incremental polling continues after a snapshot."""
+        self._last_eventid = int(latest[0]["eventid"]) if latest else 0
+        self._last_full_sync = time.monotonic()
+
+    def _add_problem(self, p, keys, host):
+        """Add a problem; host is its (host ID, host name)."""
+        eid = p["eventid"]
+        hostid, host_name = host
+        # A full snapshot mostly refetches known problems; reuse their events instead of rebuilding them
+        previous = self._previous_table[1].get(eid) if self._previous_table else None
+        if previous is not None and previous[0].unchanged(p["name"], p["severity"], host_name, hostid):
+            zbx_event = previous[0]
+        else:
+            zbx_event = ZbxEvent(eid, p["name"], p["severity"], p.get("tags", []), host=host_name,
+                                 clock=p.get("clock"), hostid=hostid)
+        trigger = p.get("objectid")
+        self._problem_table[eid] = (zbx_event, keys, trigger)
+        self._eids_by_trigger[trigger].add(eid)
+        for tag_key in keys:
+            self._tag_members[tag_key][eid] = zbx_event
+
+    def _remove_problem(self, eid):
+        _, keys, trigger = self._problem_table.pop(eid)
+        eids = self._eids_by_trigger[trigger]
+        eids.discard(eid)
+        if not eids:
+            del self._eids_by_trigger[trigger]
+        for tag_key in keys:
+            self._tag_members[tag_key].pop(eid, None)
+        self.host_cache.discard(eid)
+        return keys
+
+    def _publish(self, tag_keys):
+        """Refresh the per-tag problem lists of the given keys."""
+        for tag_key in tag_keys:
+            members = self._tag_members.get(tag_key)
+            if members:
+                self._problems_by_tag[tag_key] = list(members.values())
+            else:
+                self._tag_members.pop(tag_key, None)
+                self._problems_by_tag.pop(tag_key, None)
+
+    def _begin_snapshot(self):
+        """Stream a full snapshot into fresh structures; the current table stays until it completes."""
+        self._full_sync_requested = False
+        self._previous_table = (
+            self._last_eventid, self._problem_table, self._eids_by_trigger, self._tag_members, self._problems_by_tag
         )
-        eids = [p["eventid"] for p in raw_problems]
-        eidmap = self._get_eidmap(eids)
-
-        for p in raw_problems:
-            eid = p["eventid"]
-            host = eidmap.get(eid, "N/A")
-            info = p["name"]
-            severity = p["severity"]
-            tags = p.get("tags", [])
-            zbx_event = ZbxEvent(eid, info, severity, tags, host=host)
-            for tag_key in self._get_taglist(tags):
-                self._problems_by_tag[tag_key].append(zbx_event)
-
-    def _update_svcs(self):
-        """Get Zabbix service status."""
-        self._services_by_tag.clear()
-        raw_svcs = self.zapi.service.get(
-            output=["serviceid", "status", "description"],
-            selectParents="count",
-            selectChildren=["name", "status"],
-            selectTags="extend"
+        # Until the snapshot completes the table is partial, so incremental polling must not resume
+        self._last_eventid = None
+        self._problem_table = {}
+        self._eids_by_trigger = defaultdict(set)
+        self._tag_members = defaultdict(dict)
+        self._problems_by_tag = defaultdict(list)
+
+    def _abort_snapshot(self):
+        """Put back the table a failed snapshot was replacing, so pushes never see a partial one."""
+        (self._last_eventid, self._problem_table, self._eids_by_trigger, self._tag_members,
+         self._problems_by_tag) = self._previous_table
+        self._previous_table = None
+
+    def _add_matched(self, matched, eidmap):
+        with self.metrics.phase(PHASE_INDEX):
+            for p, keys in matched:
+                self._add_problem(p, keys, eidmap.get(p["eventid"], (None, "N/A")))
+
+    def _end_snapshot(self):
+        self._previous_table = None
+        with self.metrics.phase(PHASE_INDEX):
+            self.host_cache.retain(self._problem_table)
+            self._publish(list(self._tag_members))
+
+    @staticmethod
+    def _recovered_triggers(events):
+        """Return the IDs of the triggers with a recovery event among events."""
+        return {e["objectid"] for e in events if e["value"] != "1"}
+
+    def _trigger_problem_query(self, triggers):
+        """Build problem.get parameters for the current problems of the given triggers."""
+        query = self._problem_query()
+        query["objectids"] = sorted(triggers)
+        return query
+
+    def _apply_events(self, events, triggers=(), current=(), eidmap=None):
+        """Apply new problem events, then reconcile the triggers that had a recovery event.
+
+        A recovery event may close one or all problems of its trigger, so the
+        problems of triggers are replaced by current, the matched problem.get
+        result for them; eidmap holds the hosts of its problems not in the
+        table. Other open problems keep their severity until the next full
+        sync, since problem updates do not create events.
+        """
+        with self.metrics.phase(PHASE_INDEX) as stats:
+            dirty = set()
+            for e in events:
+                eid = e["eventid"]
+                self._last_eventid = max(self._last_eventid, int(eid))
+                if e["value"] == "1":
+                    keys = self._problem_keys(e.get("tags", []))
+                    if keys and eid not in self._problem_table:
+                        host = self._event_host(e)
+                        self.host_cache.update({eid: host})
+                        self._add_problem(e, keys, host)
+                        dirty.update(keys)
+            current_eids = {p["eventid"] for p, _ in current}
+            for trigger in triggers:
+                for eid in list(self._eids_by_trigger.get(trigger, ())):
+                    if eid not in current_eids:
+                        dirty.update(self._remove_problem(eid))
+            for p, keys in current:
+                eid = p["eventid"]
+                known = self._problem_table.get(eid)
+                if known is not None:
+                    zbx_event, known_keys, _ = known
+                    if known_keys == keys and zbx_event.unchanged(p["name"], p["severity"], zbx_event.host,
+                                                                 zbx_event.hostid):
+                        continue
+                    host = (zbx_event.hostid, zbx_event.host)
+                    dirty.update(self._remove_problem(eid))
+                else:
+                    host = eidmap.get(eid, (None, "N/A"))
+                self.host_cache.update({eid: host})
+                self._add_problem(p, keys, host)
+                dirty.update(keys)
+            self._publish(dirty)
+            stats.items += len(events)
+
+    def apply_pushed_event(self, event):
+        """Apply a problem or recovery event posted by a Zabbix webhook.
+
+        event holds eventid (the problem's, also on recovery), value ("1"
+        problem, "0" recovery), name, severity, tags (list or JSON string of
+        tag dicts), host, hostid, triggerid and optionally clock (defaults to
+        now). Without hostid the event is not joined with host metadata.
+        Returns True if a tag key changed.
+        """
+        eid = str(event["eventid"])
+        with self.metrics.phase(PHASE_INDEX):
+            dirty = ()
+            if str(event["value"]) == "1":
+                tags = event.get("tags") or []
+                if isinstance(tags, str):
+                    tags = json.loads(tags)
+                keys = self._problem_keys(tags)
+                if keys and eid not in self._problem_table:
+                    problem = {
+                        "eventid": eid,
+                        "name": event["name"],
+                        "severity": event["severity"],
+                        "tags": tags,
+                        "objectid": str(event.get("triggerid", "")),
+                        "clock": event.get("clock") or int(time.time()),
+                    }
+                    hostid = event.get("hostid")
+                    host = (str(hostid) if hostid else None, event.get("host") or "N/A")
+                    self.host_cache.update({eid: host})
+                    self._add_problem(problem, keys, host)
+                    dirty = keys
+            elif eid in self._problem_table:
+                dirty = self._remove_problem(eid)
+            self._publish(dirty)
+        return bool(dirty)
+
+    def pushed_problems(self):
+        """Output zabbix problems as updated by pushed events."""
+        return self._join_problems()
+
+    def _join_problems(self):
+        """Return problems by tag, joined against the host metadata cache.
+
+        Drops problems of hosts in maintenance if configured and regroups
+        the remaining ones by host group for problem_groups().
+        """
+        if self.host_metadata is None:
+            return dict(self._problems_by_tag)
+        with self.metrics.phase(PHASE_INDEX) as stats:
+            in_maintenance = self.host_metadata.in_maintenance if self.exclude_maintenance else frozenset()
+            problems = {}
+            for tag_key, events in self._problems_by_tag.items():
+                if in_maintenance:
+                    events = [e for e in events if e.hostid not in in_maintenance]
+                if events:
+                    problems[tag_key] = events
+            if self.host_groups:
+                # Configured groups missing from Zabbix are left out, so their sensors turn unavailable
+                by_group = {group: [] for group in self.host_groups & self.host_metadata.groups}
+                for zbx_event, _, _ in self._problem_table.values():
+                    host = self.host_metadata.get(zbx_event.hostid)
+                    if host is None or zbx_event.hostid in in_maintenance:
+                        continue
+                    for group in host.groups:
+                        if group in by_group:
+                            by_group[group].append(zbx_event)
+                self._problems_by_group = by_group
+            stats.items += len(self._problem_table)
+        return problems
+
+    def unjoined_problems(self):
+        """Output problems by tag before the host metadata join.
+
+        A tag's list is replaced whenever its problems change, so callers can
+        compare lists by identity.
+        """
+        return dict(self._problems_by_tag)
+
+    def problem_groups(self):
+        """Output the problems of the last problems() call by host group."""
+        return dict(self._problems_by_group)
+
+    def _needs_topology(self):
+        return (
+            self.topology_interval <= 0
+            or self._svc_roots is None
+            or time.monotonic() - self._last_topology >= self.topology_interval
         )
-        for service in raw_svcs:
-            if int(service["parents"]) == 0:
+
+    def _set_topology(self, raw_svcs):
+        """Cache copies of root services with their children and tags.
+
+        Statuses are later updated in place, so the API result, which may be
+        shared with other entries, is not kept.
+        """
+        self._svc_roots = [
+            dict(s, children=[dict(child) for child in s["children"]])
+            for s in raw_svcs if int(s["parents"]) == 0
+        ]
+        self._svc_count = len(raw_svcs)
+        self._last_topology = time.monotonic()
+
+    def _apply_svc_status(self, statuses):
+        """Update cached root and child statuses in place; False if the service set changed."""
+        if len(statuses) != self._svc_count:
+            return False
+        status_by_id = {s["serviceid"]: s["status"] for s in statuses}
+        for root in self._svc_roots:
+            for service in (root, *root["children"]):
+                status = status_by_id.get(service["serviceid"])
+                if status is None:
+                    return False
+                service["status"] = status
+        return True
+
+    def _index_svcs(self):
+        """Group cached root services by tag."""
+        with self.metrics.phase(PHASE_INDEX):
+            self._services_by_tag.clear()
+            for service in self._svc_roots:
                 eid = service["serviceid"]
-                info = service["children"]
+                # Copy children so published events don't see later in-place status updates
+                info = [dict(child) for child in service["children"]]
                 tags = service.get("tags", [])
                 severity = service["status"]
                 name = service["description"]
@@ -118,15 +984,150 @@ class Zbx:
                 for tag_key in self._get_taglist(tags):
                     self._services_by_tag[tag_key].append(zbx_event)
 
+    async def async_connect(self, client_session=None):
+        """Log in to the Zabbix API through the client, optionally on a shared aiohttp session."""
+        await self.client.async_connect(client_session)
+        self.zapi = self.client.zapi
+        self.api_version = self.client.api_version
+
+    async def async_close(self):
+        """Close the client."""
+        await self.client.async_close()
+        self.zapi = None
+
+    async def _async_call(self, phase, method, query):
+        """Run an API method through the client, timed and counted under phase."""
+        with self.metrics.phase(phase) as stats:
+            result = await self.client.async_call(method, query)
+            stats.items += len(result) if isinstance(result, list) else 0
+        return result
+
+    async def _async_get_eidmap(self, eids):
+        """Map event IDs to (host ID, host name), looking up only uncached ones."""
+        eidmap, missing = self.host_cache.lookup(eids)
+        if missing:
+            events = await self._async_call(PHASE_EVENT_HOSTS, "event.get", self._eidmap_query(missing))
+            fetched = self._build_eidmap(events)
+            self.host_cache.update(fetched)
+            eidmap.update(fetched)
+        _LOGGER.debug("Host cache: %d hits, %d misses, %d entries",
+                      self.host_cache.hits, self.host_cache.misses, len(self.host_cache))
+        return eidmap
+
+    async def _async_update_problems(self):
+        """Get current problems grouped by tag."""
+        if not self._problems_enabled():
+            return
+        if not self._needs_full_sync():
+            await self._async_update_incremental()
+            return
+        latest = None
+        if self.full_sync_interval > 0:
+            latest = await self._async_call(PHASE_EVENT_POLL, "event.get", self._last_eventid_query())
+        self._begin_snapshot()
+        try:
+            async for page in self._async_problem_pages():
+                matched = self._match_problems(page)
+                if matched:
+                    self._add_matched(matched, await self._async_get_eidmap([p["eventid"] for p, _ in matched]))
+        except BaseException:
+            self._abort_snapshot()
+            raise
+        self._end_snapshot()
+        if latest is not None:
+            self._mark_full_sync(latest)
+
+    async def _async_update_incremental(self):
+        """Apply the trigger events since the last poll; nothing changes unless every call succeeds."""
+        events = await self._async_call(PHASE_EVENT_POLL, "event.get", self._event_query())
+        triggers = self._recovered_triggers(events)
+        current = ()
+        eidmap = {}
+        if triggers:
+            current = self._match_problems(
+                await self._async_call(PHASE_PROBLEM_GET, "problem.get", self._trigger_problem_query(triggers))
+            )
+            new_eids = [p["eventid"] for p, _ in current if p["eventid"] not in self._problem_table]
+            if new_eids:
+                eidmap = await self._async_get_eidmap(new_eids)
+        self._apply_events(events, triggers, current, eidmap)
+
+    async def _async_problem_pages(self):
+        """Yield problem.get results, page by page if page_size is set."""
+        if not self.page_size:
+            yield await self._async_call(PHASE_PROBLEM_GET, "problem.get", self._problem_query())
+            return
+        eventid_from = None
+        while True:
+            page = await self._async_call(
+                PHASE_PROBLEM_GET, "problem.get", self._problem_page_query(eventid_from)
+            )
+            yield page
+            eventid_from = self._next_page_start(page)
+            if eventid_from is None:
+                return
+
+    async def _async_update_svcs(self):
+        """Get Zabbix service status."""
+        if self._needs_topology() or not self._apply_svc_status(
+                await self._async_call(PHASE_SERVICE_STATUS, "service.get", self._svc_status_query())):
+            self._set_topology(await self._async_call(PHASE_SERVICE_GET, "service.get", self._svc_query()))
+        self._index_svcs()
+
+    async def async_tag_index(self):
+        """Return a Counter of the "tag:value" keys of current and recently resolved problems."""
+        counts = Counter()
+        eventid_from = None
+        while True:
+            page = await self._async_call(PHASE_PROBLEM_GET, "problem.get", self._tag_index_query(eventid_from))
+            self._count_tags(page, counts)
+            eventid_from = self._next_page_start(page)
+            if eventid_from is None:
+                return counts
+
+    async def async_host_groups(self):
+        """Return the sorted names of host groups with monitored hosts."""
+        groups = await self._async_call(PHASE_HOST_GET, "hostgroup.get", self._host_group_query())
+        return sorted(group["name"] for group in groups)
+
+    async def async_problems(self):
+        """Output zabbix problems."""
+        if self._problems_enabled() and self._needs_host_metadata():
+            self.host_metadata.update(await self._async_call(PHASE_HOST_GET, "host.get", self._host_query()))
+        await self._async_update_problems()
+        return self._join_problems()
+
+    async def async_services(self):
+        """Output zabbix services."""
+        await self._async_update_svcs()
+        return dict(self._services_by_tag)
+
+
+class Zbx:
+    """Blocking AsyncZbx for scripts; each call logs in and runs on its own event loop."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Initialize the class with AsyncZbx arguments and verify the login."""
+        self.zbx = AsyncZbx(*args, **kwargs)
+        self._run(None)
+
+    def _run(self, method):
+        return asyncio.run(self._async_run(method))
+
+    async def _async_run(self, method):
+        await self.zbx.async_connect()
+        try:
+            return None if method is None else await method()
+        finally:
+            await self.zbx.async_close()
+
     def problems(self):
         """Output zabbix problems."""
-        self._update_problems()
-        return dict(self._problems_by_tag)
+        return self._run(self.zbx.async_problems)
 
     def services(self):
         """Output zabbix services."""
-        self._update_svcs()
-        return dict(self._services_by_tag)
+        return self._run(self.zbx.async_services)
 
 
 if __name__ == "__main__":